@@ -5,6 +5,8 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.models.user_model import Base  # adjust "myapp.models" to the actual location of your Base
+from app.models.refresh_token_model import RefreshToken  # noqa: F401  registers the table on Base.metadata
+from app.models.rate_limit_model import RateLimitCounter  # noqa: F401  registers the table on Base.metadata
 
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,41 @@
+"""add search filter indexes
+
+Revision ID: 0d3c9e5b7a18
+Revises: f2b6e8a41c57
+Create Date: 2026-10-18 17:30:12.774105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d3c9e5b7a18'
+down_revision: Union[str, None] = 'f2b6e8a41c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_role_created_at', 'users', ['role', sa.text('created_at DESC')],
+            unique=False, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_locked_created_at', 'users', [sa.text('created_at DESC')],
+            unique=False, postgresql_where=sa.text('is_locked'), postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_professional_created_at', 'users', [sa.text('created_at DESC')],
+            unique=False, postgresql_where=sa.text('is_professional'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_professional_created_at', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_locked_created_at', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_role_created_at', table_name='users', postgresql_concurrently=True)
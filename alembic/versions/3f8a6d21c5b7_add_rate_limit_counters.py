@@ -0,0 +1,31 @@
+"""add rate limit counters
+
+Revision ID: 3f8a6d21c5b7
+Revises: 7c1e4b9a2f3d
+Create Date: 2026-10-18 11:40:05.220614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a6d21c5b7'
+down_revision: Union[str, None] = '7c1e4b9a2f3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rate_limit_counters',
+    sa.Column('key', sa.String(length=320), nullable=False),
+    sa.Column('window_start', sa.BigInteger(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rate_limit_counters')
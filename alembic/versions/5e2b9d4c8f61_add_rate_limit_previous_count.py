@@ -0,0 +1,26 @@
+"""add rate limit previous count
+
+Revision ID: 5e2b9d4c8f61
+Revises: 9a4f2c7e1d35
+Create Date: 2026-10-18 21:12:47.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b9d4c8f61'
+down_revision: Union[str, None] = '9a4f2c7e1d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('rate_limit_counters', sa.Column('previous_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('rate_limit_counters', 'previous_count')
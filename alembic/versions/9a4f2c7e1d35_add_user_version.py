@@ -0,0 +1,26 @@
+"""add user version
+
+Revision ID: 9a4f2c7e1d35
+Revises: 0d3c9e5b7a18
+Create Date: 2026-10-18 19:41:06.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f2c7e1d35'
+down_revision: Union[str, None] = '0d3c9e5b7a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'version')
@@ -0,0 +1,26 @@
+"""add user token version
+
+Revision ID: b5d92e7f1a04
+Revises: 3f8a6d21c5b7
+Create Date: 2026-10-18 13:02:47.905112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d92e7f1a04'
+down_revision: Union[str, None] = '3f8a6d21c5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
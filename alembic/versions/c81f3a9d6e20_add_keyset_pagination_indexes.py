@@ -0,0 +1,41 @@
+"""add keyset pagination indexes
+
+Revision ID: c81f3a9d6e20
+Revises: b5d92e7f1a04
+Create Date: 2026-10-18 15:21:09.448310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f3a9d6e20'
+down_revision: Union[str, None] = 'b5d92e7f1a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+KEYSET_INDEXES = (
+    ('ix_users_created_at_id', ['created_at', 'id']),
+    ('ix_users_updated_at_id', ['updated_at', 'id']),
+    ('ix_users_first_name_id', ['first_name', 'id']),
+    ('ix_users_last_name_id', ['last_name', 'id']),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the table writable while the indexes build; it cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        for name, columns in KEYSET_INDEXES:
+            op.create_index(
+                name, 'users', columns, unique=False, postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(KEYSET_INDEXES):
+            op.drop_index(name, table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,41 @@
+"""add user search vector
+
+Revision ID: f2b6e8a41c57
+Revises: e4a7c2d90b13
+Create Date: 2026-10-18 16:48:51.602931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6e8a41c57'
+down_revision: Union[str, None] = 'e4a7c2d90b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(nickname, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(bio, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites the table; run it in a maintenance window on large tables.
+    op.add_column('users', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True)))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_search_vector', 'users', ['search_vector'], unique=False,
+            postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_search_vector', table_name='users', postgresql_concurrently=True)
+    op.drop_column('users', 'search_vector')
@@ -1,21 +1,204 @@
+import itertools
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 Base = declarative_base()
 
+# Carries a client's read-your-writes deadline (Unix time) between requests, and so between workers.
+READ_YOUR_WRITES_COOKIE = "primary_reads_until"
+
+class PoolWaitHistogram:
+    """Cumulative histogram of how long connection checkouts waited, in milliseconds."""
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.timeouts = 0
+
+    def observe(self, wait_ms: float):
+        self.counts[bisect_left(self.BUCKETS_MS, wait_ms)] += 1
+        self.total_ms += wait_ms
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{bound}" for bound in self.BUCKETS_MS] + ["le_inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": sum(self.counts),
+            "sum_ms": round(self.total_ms, 3),
+            "timeouts": self.timeouts,
+        }
+
+# Seconds the current checkout has spent opening new connections; None outside a checkout.
+_checkout_connect_seconds: ContextVar[Optional[float]] = ContextVar("checkout_connect_seconds", default=None)
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records how long each checkout waited for a connection. Time spent
+    opening a new connection when the pool grows is not waiting, so it is left out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = PoolWaitHistogram()
+
+    def _do_get(self):
+        if _checkout_connect_seconds.get() is not None:
+            # QueuePool._do_get retries by calling itself; the outermost call does the recording.
+            return super()._do_get()
+        token = _checkout_connect_seconds.set(0.0)
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_histogram.timeouts += 1
+            raise
+        finally:
+            connecting = _checkout_connect_seconds.get()
+            _checkout_connect_seconds.reset(token)
+        self.wait_histogram.observe(max(time.perf_counter() - started - connecting, 0.0) * 1000)
+        return connection
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            connecting = _checkout_connect_seconds.get()
+            if connecting is not None:
+                _checkout_connect_seconds.set(connecting + time.perf_counter() - started)
+
+def _asyncpg_connect_args(statement_cache_size: int, pgbouncer_transaction_mode: bool) -> dict:
+    """Driver options for asyncpg; PgBouncer transaction pooling cannot use named prepared statements."""
+    if pgbouncer_transaction_mode:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": statement_cache_size}
+
+class WriteTrackingSession(Session):
+    """Session that notes committed writes so the same client's next reads stay on the primary."""
+
+@event.listens_for(WriteTrackingSession, "after_flush")
+def _note_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(WriteTrackingSession, "do_orm_execute")
+def _note_write_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(WriteTrackingSession, "after_commit")
+def _mark_committed_write(session):
+    key = session.info.get("read_your_writes_key")
+    if session.info.pop("wrote", False) and key is not None:
+        Database.mark_write(key)
+        # Other workers cannot see this process's marks; the response carries the deadline to the
+        # client (see READ_YOUR_WRITES_COOKIE) so its next read is pinned wherever it lands.
+        request_state = session.info.get("request_state")
+        if request_state is not None:
+            request_state.primary_reads_until = time.time() + Database._read_your_writes_seconds
+
+@event.listens_for(WriteTrackingSession, "after_rollback")
+def _forget_rolled_back_write(session):
+    session.info.pop("wrote", None)
+
+class ReadOnlySession(Session):
+    """Session for reads that run outside a transaction; flushing ORM changes through it is an error."""
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_flush(session, flush_context, instances):
+    raise InvalidRequestError("Read-only sessions cannot write; use the primary session from get_db.")
+
+def read_only_session_factory(engine):
+    """Sessions whose statements run in autocommit mode, so a read costs one round trip with no BEGIN or COMMIT."""
+    return sessionmaker(
+        bind=engine.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession,
+        sync_session_class=ReadOnlySession, expire_on_commit=False, future=True
+    )
+
+def snapshot_session_factory(engine):
+    """
+    Read-only sessions that run in one REPEATABLE READ transaction: every statement sees the same
+    snapshot, and the open transaction lets a server-side cursor stream a large result.
+    """
+    return sessionmaker(
+        bind=engine.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True),
+        class_=AsyncSession, sync_session_class=ReadOnlySession, expire_on_commit=False, future=True
+    )
+
 class Database:
     """Handles database connections and sessions."""
     _engine = None
     _session_factory = None
+    _primary_read_session_factory = None
+    _primary_snapshot_session_factory = None
+    _read_engines = []
+    _read_session_factories = []
+    _snapshot_session_factories = []
+    _read_cursor = itertools.count()
+    _read_your_writes_seconds = 5.0
+    _max_overflow = 10
+    _recent_writes: Dict[str, float] = {}
+    _recent_writes_max = 10000
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+    def initialize(
+        cls,
+        database_url: str,
+        echo: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        pgbouncer_transaction_mode: bool = False,
+        replica_urls: Sequence[str] = (),
+        read_your_writes_seconds: float = 5.0,
+    ):
+        """Initialize the async engine and sessionmaker, plus one engine per read replica."""
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            engine_options = dict(
+                echo=echo,
+                future=True,
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_recycle=pool_recycle,
+                pool_pre_ping=pool_pre_ping,
+                connect_args=_asyncpg_connect_args(statement_cache_size, pgbouncer_transaction_mode),
+            )
+            cls._engine = create_async_engine(database_url, **engine_options)
             cls._session_factory = sessionmaker(
-                bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
+                bind=cls._engine, class_=AsyncSession, sync_session_class=WriteTrackingSession,
+                expire_on_commit=False, future=True
             )
+            cls._primary_read_session_factory = read_only_session_factory(cls._engine)
+            cls._primary_snapshot_session_factory = snapshot_session_factory(cls._engine)
+            # Replica connections refuse writes at the server as well.
+            replica_connect_args = dict(
+                engine_options["connect_args"], server_settings={"default_transaction_read_only": "on"}
+            )
+            cls._read_engines = [
+                create_async_engine(url, **dict(engine_options, connect_args=replica_connect_args))
+                for url in replica_urls
+            ]
+            cls._read_session_factories = [read_only_session_factory(engine) for engine in cls._read_engines]
+            cls._snapshot_session_factories = [snapshot_session_factory(engine) for engine in cls._read_engines]
+            cls._read_your_writes_seconds = read_your_writes_seconds
+            cls._max_overflow = max_overflow
 
     @classmethod
     def get_session_factory(cls):
@@ -23,3 +206,60 @@ class Database:
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
         return cls._session_factory
+
+    @classmethod
+    def get_read_session_factory(cls, key: Optional[str] = None, snapshot: bool = False, pinned: bool = False):
+        """
+        Returns a read-only session factory: the next replica in round-robin order, or the primary
+        when no replicas are configured, `pinned` is set (the client says it wrote recently, possibly
+        through another worker) or `key` wrote through this process within the read-your-writes
+        window. With `snapshot`, its sessions read in one transaction (see `snapshot_session_factory`).
+        """
+        if cls._primary_read_session_factory is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        if snapshot:
+            primary, replicas = cls._primary_snapshot_session_factory, cls._snapshot_session_factories
+        else:
+            primary, replicas = cls._primary_read_session_factory, cls._read_session_factories
+        if not replicas or pinned or (key is not None and cls.wrote_recently(key)):
+            return primary
+        return replicas[next(cls._read_cursor) % len(replicas)]
+
+    @classmethod
+    def mark_write(cls, key: str):
+        """Pins reads for `key` (a user or client) to the primary for the read-your-writes window."""
+        now = time.monotonic()
+        if len(cls._recent_writes) >= cls._recent_writes_max:
+            cls._recent_writes = {k: until for k, until in cls._recent_writes.items() if until > now}
+        cls._recent_writes[key] = now + cls._read_your_writes_seconds
+
+    @classmethod
+    def wrote_recently(cls, key: str) -> bool:
+        until = cls._recent_writes.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            cls._recent_writes.pop(key, None)
+            return False
+        return True
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """Returns a snapshot of the connection pools: sizes, current usage and checkout wait times."""
+        if cls._engine is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        stats = _pool_snapshot(cls._engine, cls._max_overflow)
+        stats["replicas"] = [_pool_snapshot(engine, cls._max_overflow) for engine in cls._read_engines]
+        return stats
+
+def _pool_snapshot(engine, max_overflow: int) -> dict:
+    pool = engine.sync_engine.pool
+    return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "wait_time_ms": pool.wait_histogram.snapshot(),
+        }
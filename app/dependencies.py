@@ -1,11 +1,15 @@
-from builtins import Exception, dict, str
-from fastapi import Depends, HTTPException
+from builtins import Exception, dict, isinstance, str
+import hashlib
+import time
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import Database
+from app.database import READ_YOUR_WRITES_COOKIE, Database
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
-from app.services.jwt_service import decode_token
+from app.services.jwt_service import decode_token_cached
+from app.services.token_revocation_service import token_revocation_registry
+from app.utils.rate_limiter import get_rate_limiter, retry_after_header
 from settings.config import Settings
 from fastapi import Depends
 
@@ -17,32 +21,81 @@ def get_email_service() -> EmailService:
     template_manager = TemplateManager()
     return EmailService(template_manager=template_manager)
 
-async def get_db() -> AsyncSession:
+def _read_your_writes_key(request: Request) -> str:
+    """Identifies the client whose writes must be visible to its own later reads: the token subject, else the IP."""
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return f"sub:{current_user['user_id']}"
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        payload = decode_token_cached(token)
+        if payload and payload.get("sub"):
+            return f"sub:{payload['sub']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+def _reads_pinned_to_primary(request: Request) -> bool:
+    """Whether the client's cookie says it committed a write within the read-your-writes window."""
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+async def get_db(request: Request) -> AsyncSession:
     """Dependency that provides a database session for each request."""
     async_session_factory = Database.get_session_factory()
     async with async_session_factory() as session:
+        session.info["read_your_writes_key"] = _read_your_writes_key(request)
+        session.info["request_state"] = request.state
         try:
             yield session
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
-        
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """
+    Dependency that provides a session for read-only work. It is served by a read replica when one is
+    configured, unless this client committed a write recently, in which case it reads from the primary.
+    """
+    async_session_factory = Database.get_read_session_factory(
+        _read_your_writes_key(request), pinned=_reads_pinned_to_primary(request)
+    )
+    async with async_session_factory() as session:
+        yield session
+
+def get_snapshot_session_factory(request: Request):
+    """
+    Dependency that provides a factory for snapshot read sessions rather than a session. A streamed
+    response body is sent after dependencies exit, so the stream opens its session itself.
+    """
+    return Database.get_read_session_factory(
+        _read_your_writes_key(request), snapshot=True, pinned=_reads_pinned_to_primary(request)
+    )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)):
+    # Claims are decoded once per request and shared through request.state.
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     if payload is None:
         raise credentials_exception
     user_id: str = payload.get("sub")
     user_role: str = payload.get("role")
     if user_id is None or user_role is None:
         raise credentials_exception
-    return {"user_id": user_id, "role": user_role}
+    # Revocations are keyed by user id; tokens whose subject is an email carry the id as "uid".
+    if token_revocation_registry.is_revoked(payload.get("uid", user_id), payload.get("ver", 0)):
+        raise credentials_exception
+    request.state.current_user = {"user_id": user_id, "role": user_role}
+    return request.state.current_user
 
 def require_role(role: str):
     def role_checker(current_user: dict = Depends(get_current_user)):
@@ -50,3 +103,52 @@ def require_role(role: str):
             raise HTTPException(status_code=403, detail="Operation not permitted")
         return current_user
     return role_checker
+
+async def _rate_limit_target(scope: str, request: Request):
+    """Extracts the account a rate-limited request is aimed at, from the already parsed body or path."""
+    try:
+        if scope == "login":
+            return (await request.form()).get("username")
+        if scope == "register":
+            body = await request.json()
+            return body.get("email") if isinstance(body, dict) else None
+        if scope == "verify_email":
+            return request.path_params.get("user_id")
+    except Exception:
+        return None
+    return None
+
+def rate_limit(scope: str):
+    """
+    Builds a dependency that rejects requests over the configured limits for ``scope`` with 429.
+
+    Limits apply per client IP and per target account. Declare it in the route decorator's
+    ``dependencies`` so it runs before the database session is opened.
+    """
+    async def check_rate_limit(request: Request):
+        settings = get_settings()
+        if not settings.rate_limit_enabled:
+            return
+        limits = {
+            "login": (settings.rate_limit_login_per_ip, settings.rate_limit_login_per_target),
+            "register": (settings.rate_limit_register_per_ip, settings.rate_limit_register_per_target),
+            "verify_email": (settings.rate_limit_verify_email_per_ip, settings.rate_limit_verify_email_per_target),
+        }
+        per_ip, per_target = limits[scope]
+        window = settings.rate_limit_window_seconds
+        client_ip = request.client.host if request.client else "unknown"
+        rules = [(f"{scope}:ip:{client_ip}", per_ip, window)]
+        target = await _rate_limit_target(scope, request)
+        if target:
+            # The target comes straight from the request; hashing bounds the key's length.
+            target_digest = hashlib.sha256(str(target).lower().encode()).hexdigest()
+            rules.append((f"{scope}:target:{target_digest}", per_target, window))
+
+        retry_after = await get_rate_limiter().check(rules)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please try again later.",
+                headers={"Retry-After": retry_after_header(retry_after)},
+            )
+    return check_rate_limit
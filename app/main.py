@@ -1,10 +1,14 @@
 from builtins import Exception
+import math
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware  # Import the CORSMiddleware
-from app.database import Database
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+from app.database import READ_YOUR_WRITES_COOKIE, Database
 from app.dependencies import get_settings
-from app.routers import user_routes
+from app.routers import system_routes, user_routes
+from app.services.token_revocation_service import token_revocation_sync
+from app.utils.security import PasswordHashPoolBusy, calibrate_bcrypt_rounds_async, shutdown_password_hash_pool
 from app.utils.api_description import getDescription
 app = FastAPI(
     title="User Management",
@@ -27,16 +31,54 @@ app.add_middleware(
     allow_methods=["*"],  # Allowed HTTP methods
     allow_headers=["*"],  # Allowed HTTP headers
 )
+# Requests arrive through nginx; take the client address (used for per-IP rate limits) from
+# X-Forwarded-For, but only when the connecting peer is one of the configured proxies.
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=get_settings().forwarded_allow_ips)
+
+@app.middleware("http")
+async def read_your_writes_cookie(request, call_next):
+    """Hands a client that just committed a write the deadline until which its reads must use the primary."""
+    response = await call_next(request)
+    until = getattr(request.state, "primary_reads_until", None)
+    if until is not None:
+        max_age = math.ceil(get_settings().database_read_your_writes_seconds)
+        response.set_cookie(READ_YOUR_WRITES_COOKIE, f"{until:.3f}", max_age=max_age, httponly=True, samesite="lax")
+    return response
 
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(
+        settings.database_url,
+        settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        statement_cache_size=settings.db_statement_cache_size,
+        pgbouncer_transaction_mode=settings.db_pgbouncer_transaction_mode,
+        replica_urls=settings.database_replica_urls,
+        read_your_writes_seconds=settings.database_read_your_writes_seconds,
+    )
+    if settings.bcrypt_target_hash_ms > 0:
+        await calibrate_bcrypt_rounds_async(settings.bcrypt_target_hash_ms, settings.bcrypt_min_rounds, settings.bcrypt_max_rounds)
+    token_revocation_sync.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await token_revocation_sync.stop()
+    shutdown_password_hash_pool()
+
+@app.exception_handler(PasswordHashPoolBusy)
+async def password_hash_pool_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"message": "Server is busy, please try again shortly."}, headers={"Retry-After": "1"})
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
     return JSONResponse(status_code=500, content={"message": "An unexpected error occurred."})
 
 app.include_router(user_routes.router)
+app.include_router(system_routes.router)
 
 
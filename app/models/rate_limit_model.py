@@ -0,0 +1,21 @@
+from builtins import int, str
+from sqlalchemy import BigInteger, Column, Integer, String
+from sqlalchemy.orm import Mapped
+from app.database import Base
+
+class RateLimitCounter(Base):
+    """
+    Shared sliding-window request counter used by the Postgres rate limiting backend.
+
+    Attributes:
+        key (str): The rate limit key, e.g. ``login:ip:203.0.113.7``.
+        window_start (int): Start of the current window as a Unix timestamp.
+        count (int): Number of hits recorded in the current window.
+        previous_count (int): Number of hits recorded in the window before it.
+    """
+    __tablename__ = "rate_limit_counters"
+
+    key: Mapped[str] = Column(String(320), primary_key=True)
+    window_start: Mapped[int] = Column(BigInteger, nullable=False)
+    count: Mapped[int] = Column(Integer, nullable=False, default=0)
+    previous_count: Mapped[int] = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,39 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, LargeBinary, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class RefreshToken(Base):
+    """
+    Represents an issued refresh token, corresponding to the 'refresh_tokens' table in the database.
+
+    Only a SHA-256 digest of the token is stored. Tokens issued by rotating one another share a
+    family id, so reuse of an already rotated token can revoke the whole family at once.
+
+    Attributes:
+        id (UUID): Unique identifier for the token record.
+        family_id (UUID): Identifier shared by all tokens of one login session.
+        user_id (UUID): The user the token was issued to.
+        token_hash (bytes): SHA-256 digest of the opaque token, unique.
+        expires_at (datetime): Timestamp after which the token can no longer be used.
+        used_at (datetime): Timestamp at which the token was rotated, if it was.
+        revoked_at (datetime): Timestamp at which the token family was revoked, if it was.
+        created_at (datetime): Timestamp when the token was issued, set by the server.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    family_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), nullable=False, index=True)
+    user_id: Mapped[uuid.UUID] = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash: Mapped[bytes] = Column(LargeBinary(32), unique=True, nullable=False, index=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    used_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        """Provides a readable representation of a refresh token record."""
+        return f"<RefreshToken family={self.family_id}, user={self.user_id}>"
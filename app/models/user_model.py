@@ -3,9 +3,9 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    Column, Computed, String, Integer, DateTime, Boolean, Index, func, text, Enum as SQLAlchemyEnum
 )
-from sqlalchemy.dialects.postgresql import UUID, ENUM
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
@@ -16,6 +16,14 @@ class UserRole(Enum):
     MANAGER = "MANAGER"
     ADMIN = "ADMIN"
 
+# Weighted document for full-text search: nickname and names rank above the bio. The 'simple'
+# configuration neither stems nor drops stop words, which suits names and nicknames.
+USER_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(nickname, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(bio, '')), 'B')"
+)
+
 class User(Base):
     """
     Represents a user within the application, corresponding to the 'users' table in the database.
@@ -40,6 +48,10 @@ class User(Base):
         last_login_at (datetime): Timestamp of the last login.
         failed_login_attempts (int): Count of failed login attempts.
         is_locked (bool): Flag indicating if the account is locked.
+        token_version (int): Incremented to revoke every access token issued before the change.
+        version (int): Row version for optimistic concurrency, incremented by profile and admin changes (not by login
+            or lockout bookkeeping); served as the ETag.
+        search_vector (tsvector): Generated full-text document over nickname, names and bio; deferred.
         created_at (datetime): Timestamp when the user was created, set by the server.
         updated_at (datetime): Timestamp of the last update, set by the server.
 
@@ -52,6 +64,18 @@ class User(Base):
     """
     __tablename__ = "users"
     __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # (sort key, id) indexes serve keyset pagination for every sortable column without a unique index.
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_updated_at_id", "updated_at", "id"),
+        Index("ix_users_first_name_id", "first_name", "id"),
+        Index("ix_users_last_name_id", "last_name", "id"),
+        Index("ix_users_search_vector", "search_vector", postgresql_using="gin"),
+        # search_users filter indexes; tests/test_services/test_query_plans.py pins the plans they serve.
+        Index("ix_users_role_created_at", "role", text("created_at DESC")),
+        Index("ix_users_locked_created_at", text("created_at DESC"), postgresql_where=text("is_locked")),
+        Index("ix_users_professional_created_at", text("created_at DESC"), postgresql_where=text("is_professional")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     nickname: Mapped[str] = Column(String(50), unique=True, nullable=False, index=True)
@@ -68,11 +92,14 @@ class User(Base):
     last_login_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
     failed_login_attempts: Mapped[int] = Column(Integer, default=0)
     is_locked: Mapped[bool] = Column(Boolean, default=False)
+    token_version: Mapped[int] = Column(Integer, nullable=False, default=0, server_default="0")
+    version: Mapped[int] = Column(Integer, nullable=False, default=1, server_default="1")
     created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     verification_token = Column(String, nullable=True)
     email_verified: Mapped[bool] = Column(Boolean, default=False, nullable=False)
     hashed_password: Mapped[str] = Column(String(255), nullable=False)
+    search_vector = mapped_column(TSVECTOR, Computed(USER_SEARCH_VECTOR_SQL, persisted=True), deferred=True)
 
 
     def __repr__(self) -> str:
@@ -0,0 +1,46 @@
+from builtins import classmethod, str
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import Row, bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User
+
+# Columns a UserResponse (and its ETag) is built from. Reading only these skips hashed_password, verification_token
+# and search_vector, and returns plain rows instead of identity-mapped User instances.
+USER_VIEW_COLUMNS = (
+    User.id, User.nickname, User.email, User.first_name, User.last_name, User.bio,
+    User.profile_picture_url, User.linkedin_profile_url, User.github_profile_url, User.role,
+    User.is_professional, User.last_login_at, User.created_at, User.updated_at, User.version,
+)
+
+# The lookups are built once, at import, from the plain Table columns. A statement object memoizes
+# its cache key, so a call skips construction and cache-key generation and hits the compiled cache;
+# asyncpg then reuses the prepared statement it keeps per connection for that SQL. Table columns
+# (rather than the mapped attributes) keep Session.execute off the ORM execution path, which would
+# otherwise cost about as much again as everything else.
+_users = User.__table__
+_VIEW = tuple(_users.c[column.key] for column in USER_VIEW_COLUMNS)
+_BY_ID = select(*_VIEW).where(_users.c.id == bindparam("value"))
+_BY_EMAIL = select(*_VIEW).where(_users.c.email == bindparam("value"))
+_BY_NICKNAME = select(*_VIEW).where(_users.c.nickname == bindparam("value"))
+
+
+class UserRepository:
+    """
+    Point lookups of one user by id, email or nickname, returned as plain rows of USER_VIEW_COLUMNS.
+
+    These serve reads and existence checks. Use the ``UserService.get_by_*`` methods when the user
+    is going to be modified through the ORM.
+    """
+
+    @classmethod
+    async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[Row]:
+        return (await session.execute(_BY_ID, {"value": user_id})).first()
+
+    @classmethod
+    async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[Row]:
+        return (await session.execute(_BY_EMAIL, {"value": email})).first()
+
+    @classmethod
+    async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[Row]:
+        return (await session.execute(_BY_NICKNAME, {"value": nickname})).first()
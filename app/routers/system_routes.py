@@ -0,0 +1,31 @@
+"""
+Operational endpoints for administrators: runtime statistics that help size and tune the service.
+"""
+from builtins import dict
+from fastapi import APIRouter, Depends
+from app.database import Database
+from app.dependencies import require_role
+from app.services.user_service import user_cache
+
+router = APIRouter()
+
+@router.get("/system/db-pool", name="db_pool_stats", tags=["System (Admin Role)"])
+async def db_pool_stats(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Database connection pool statistics.
+
+    Reports the configured pool size, connections currently checked in and out, overflow in use,
+    and a histogram of how long checkouts waited for a connection.
+    """
+    return Database.pool_stats()
+
+
+@router.get("/system/user-cache", name="user_cache_stats", tags=["System (Admin Role)"])
+async def user_cache_stats(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    User lookup cache statistics for this worker.
+
+    Reports cached rows and known-missing lookups against the configured bound and TTLs, along with
+    hits, negative hits, misses, evictions and invalidations since startup.
+    """
+    return user_cache.stats()
@@ -20,25 +20,69 @@ Key Highlights:
 from app.models.user_model import UserRole
 
 from builtins import dict, int, len, str
-from datetime import timedelta
+from datetime import date, timedelta
+from typing import Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
-from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_current_user, get_db, get_email_service, require_role
+from app.dependencies import (
+    get_current_user, get_db, get_email_service, get_read_db, get_snapshot_session_factory, oauth2_scheme, rate_limit, require_role
+)
 from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
-from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
+from app.schemas.token_schema import RefreshTokenRequest, TokenResponse
+from app.schemas.user_schemas import (
+    LoginRequest, UserBase, UserBulkUpdateRequest, UserBulkUpdateResponse, UserCreate, UserImportReport, UserListResponse,
+    UserResponse, UserUpdate
+)
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.user_export_service import EXPORT_MEDIA_TYPES, UserExportService
+from app.services.user_import_service import InvalidImportFormat, UserImportService, import_format
 from app.services.user_service import UserService
 from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.utils.etag import format_etag, parse_if_match
+from app.utils.link_generation import create_user_links, generate_cursor_links, generate_pagination_links
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
 router = APIRouter()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
+# Declared before /users/{user_id} so "export" is not parsed as a user id.
+@router.get("/users/export", name="export_users", tags=["User Management Requires (Admin or Manager Roles)"], response_class=StreamingResponse)
+async def export_users(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Output format: ndjson or csv (with a header line)"),
+    email: Optional[str] = Query(None, description="Search users by email address"),
+    nickname: Optional[str] = Query(None, description="Search users by nickname"),
+    first_name: Optional[str] = Query(None, description="Search users by first name"),
+    last_name: Optional[str] = Query(None, description="Search users by last name"),
+    role: Optional[UserRole] = Query(None, description="Filter users by role: AUTHENTICATED,ANONYMOUS,ADMIN"),
+    is_locked: Optional[Literal[True, False]] = Query(None, description="Filter by account lock status (true/false)"),
+    is_professional: Optional[Literal[True, False]] = Query(None, description="Filter users by professional status (true/false)"),
+    registered_from: Optional[date] = Query(None, description="Start date for registration filter (YYYY-MM-DD)"),
+    registered_to: Optional[date] = Query(None, description="End date for registration filter (YYYY-MM-DD)"),
+    q: Optional[str] = Query(None, description="Full-text search over nickname, first/last name and bio"),
+    session_factory=Depends(get_snapshot_session_factory),
+    current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
+):
+    """
+    Stream every user matching the GET /users/ filters as NDJSON or CSV, in one response.
+
+    Rows are read from a server-side cursor inside one read-only snapshot and written out batch by
+    batch, so the export is consistent and memory stays flat regardless of how many users match.
+    """
+    filters = dict(
+        email=email, nickname=nickname, first_name=first_name, last_name=last_name, role=role,
+        is_locked=is_locked, is_professional=is_professional, registered_from=registered_from,
+        registered_to=registered_to, q=q,
+    )
+    return StreamingResponse(
+        UserExportService.stream_users(session_factory, export_format, filters),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+    )
+
 @router.get("/users/{user_id}", response_model=UserResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_user(user_id: UUID, request: Request, response: Response, db: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Endpoint to fetch a user by their unique identifier (UUID).
 
@@ -48,12 +92,15 @@ async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(g
     Args:
         user_id: UUID of the user to fetch.
         request: The request object, used to generate full URLs in the response.
-        db: Dependency that provides an AsyncSession for database access.
+        db: Dependency that provides a read-only AsyncSession (a replica when configured).
         token: The OAuth2 access token obtained through OAuth2PasswordBearer dependency.
+
+    The ETag header carries the user's version, for If-Match on PUT /users/{user_id}.
     """
-    user = await UserService.get_by_id(db, user_id)
+    user = await UserService.get_user_view(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    response.headers["ETag"] = format_etag(user.version)
 
     return UserResponse.model_construct(
         id=user.id,
@@ -89,6 +136,8 @@ async def update_user(
     user_id: UUID,
     user_update: UserUpdate,
     request: Request,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
@@ -98,25 +147,20 @@ async def update_user(
 
     - **user_id**: UUID of the user to update.
     - **user_update**: UserUpdate model with updated user information.
+    - **If-Match**: Optional ETag from GET /users/{user_id}; the update is refused with 412 if the
+      user has changed (or no longer exists) since.
     """
     user_data = user_update.model_dump(exclude_unset=True)
 
-    # 🔍 Email uniqueness check
-    if "email" in user_data:
-        existing_email_user = await UserService.get_by_email(db, user_data["email"])
-        if existing_email_user and existing_email_user.id != user_id:
-            raise HTTPException(status_code=400, detail="Email is already in use.")
-
-    # 🔍 Nickname uniqueness check
-    if "nickname" in user_data:
-        existing_nickname_user = await UserService.get_by_nickname(db, user_data["nickname"])
-        if existing_nickname_user and existing_nickname_user.id != user_id:
-            raise HTTPException(status_code=400, detail="Nickname is already in use.")
-
-    # ✅ Proceed to update
-    updated_user = await UserService.update(db, user_id, user_data)
+    # Email and nickname clashes surface from the UPDATE itself as 400s, and an If-Match mismatch
+    # as no row updated.
+    expected_versions = parse_if_match(if_match) if if_match is not None else None
+    updated_user = await UserService.update(db, user_id, user_data, expected_versions)
     if not updated_user:
+        if if_match is not None:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="User has been modified since it was read.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    response.headers["ETag"] = format_etag(updated_user.version)
 
     return UserResponse.model_construct(
         id=updated_user.id,
@@ -168,10 +212,6 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     Returns:
     - UserResponse: The newly created user's information along with navigation links.
     """
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    
     created_user = await UserService.create(db, user.model_dump(), email_service)
     if not created_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
@@ -193,6 +233,67 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     )
 
 
+@router.post("/users/import", response_model=UserImportReport, tags=["User Management Requires (Admin or Manager Roles)"], name="import_users")
+async def import_users(request: Request, send_verification_emails: bool = False, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+    """
+    Bulk-create users from an NDJSON (application/x-ndjson) or CSV (text/csv, with a header line) body.
+
+    The body is parsed as it streams in and imported in batches, so rows that fail validation or
+    uniqueness checks are reported individually without rejecting the rest of the upload.
+
+    Parameters:
+    - request (Request): The request whose body stream holds the users.
+    - send_verification_emails (bool): Send each imported user the verification email.
+    - db (AsyncSession): The database session.
+
+    Returns:
+    - UserImportReport: Imported and failed counts with per-row errors.
+    """
+    try:
+        import_format(request.headers.get("content-type"))
+    except InvalidImportFormat as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    try:
+        report = await UserImportService.import_users(
+            db,
+            request.stream(),
+            request.headers.get("content-type"),
+            email_service=email_service if send_verification_emails else None,
+        )
+    except InvalidImportFormat as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return UserImportReport(**report)
+
+
+@router.post("/users/bulk", response_model=UserBulkUpdateResponse, tags=["User Management Requires (Admin or Manager Roles)"], name="bulk_update_users")
+async def bulk_update_users(body: UserBulkUpdateRequest, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+    """
+    Lock, unlock, change the role of, or set the professional status of many users at once.
+
+    Users are selected by an id list or by the same filters as GET /users/. The caller's own account
+    is never changed. With dry_run the matching users are only counted.
+
+    Parameters:
+    - body (UserBulkUpdateRequest): The action, its target value and the user selection.
+    - db (AsyncSession): The database session.
+
+    Returns:
+    - UserBulkUpdateResponse: How many users matched or changed, and in how many chunks.
+    """
+    result = await UserService.bulk_update(
+        db,
+        body.action,
+        ids=body.ids,
+        filters=body.filters.model_dump() if body.filters is not None else None,
+        role=body.role,
+        is_professional=body.is_professional,
+        dry_run=body.dry_run,
+        chunk_size=body.chunk_size,
+        exclude_subject=current_user["user_id"],
+    )
+    return UserBulkUpdateResponse(action=body.action, dry_run=body.dry_run, **result._asdict())
+
+
 from typing import Optional,Literal
 from datetime import date
 from fastapi import Query
@@ -204,85 +305,124 @@ async def list_users(
     limit: int = Query(10, description="Maximum number of users to return"),
     email: Optional[str] = Query(None, description="Search users by email address"),
     nickname: Optional[str] = Query(None, description="Search users by nickname"),
+    first_name: Optional[str] = Query(None, description="Search users by first name"),
+    last_name: Optional[str] = Query(None, description="Search users by last name"),
     role: Optional[UserRole] = Query(None, description="Filter users by role: AUTHENTICATED,ANONYMOUS,ADMIN"),
     is_locked: Optional[Literal[True, False]] = Query(None, description="Filter by account lock status (true/false)"),
     is_professional: Optional[Literal[True, False]] = Query(None, description="Filter users by professional status (true/false)"),
     registered_from: Optional[date] = Query(None, description="Start date for registration filter (YYYY-MM-DD)"),
     registered_to: Optional[date] = Query(None, description="End date for registration filter (YYYY-MM-DD)"),
-    sort_by: str = Query("created_at", description="Sort by field (e.g. email, nickname, created_at)", example="email"),
+    q: Optional[str] = Query(None, description="Full-text search over nickname, first/last name and bio"),
+    highlight: bool = Query(False, description="Include highlighted match snippets for q"),
+    sort_by: Optional[str] = Query(None, description="Sort by field (e.g. email, nickname, created_at, relevance); defaults to relevance with q, else created_at", example="email"),
     order: str = Query("desc", description="Sort order (asc or desc)", example="asc"),
-    db: AsyncSession = Depends(get_db),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="Pagination mode: offset (skip/limit) or cursor (keyset)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next/prev link; implies cursor mode"),
+    count: Literal["exact", "estimated", "none", "cached"] = Query("exact", description="How the total is computed: exact, estimated (planner estimate), none, or cached (recent exact count)"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users, users = await UserService.search_users(
+    keyset = pagination == "cursor" or cursor is not None
+    result = await UserService.search_users(
         session=db,
         skip=skip,
         limit=limit,
         email=email,
         nickname=nickname,
+        first_name=first_name,
+        last_name=last_name,
         role=role,
         is_locked=is_locked,
         is_professional=is_professional,
         registered_from=registered_from,
         registered_to=registered_to,
         sort_by=sort_by,
-        order=order
+        order=order,
+        cursor=cursor,
+        keyset=keyset,
+        count_mode=count,
+        q=q,
+        highlight=highlight,
+        projected=True
     )
 
-    user_responses = [UserResponse.model_validate(user) for user in users]
-    pagination_links = generate_pagination_links(request, skip, limit, total_users)
+    user_responses = [UserResponse.model_validate(row._mapping) for row in result.users]
+    if keyset:
+        pagination_links = generate_cursor_links(request, limit, result.next_cursor, result.prev_cursor)
+    else:
+        # An estimated total is not precise enough to place the last page.
+        exact_total = result.total if result.total_mode in ("exact", "cached") else None
+        pagination_links = generate_pagination_links(request, skip, limit, exact_total, has_next=len(result.users) == limit)
 
     return UserListResponse(
         items=user_responses,
-        total=total_users,
-        page=skip // limit + 1,
+        total=result.total,
+        total_mode=result.total_mode,
+        page=None if keyset else skip // limit + 1,
         size=len(user_responses),
-        links=pagination_links
+        links=pagination_links,
+        next_cursor=result.next_cursor,
+        prev_cursor=result.prev_cursor,
+        highlights=result.highlights or {}
     )
 
-@router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
+@router.post("/register/", response_model=UserResponse, tags=["Login and Registration"], dependencies=[Depends(rate_limit("register"))])
 async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
     user = await UserService.register_user(session, user_data.model_dump(), email_service)
     if user:
         return user
     raise HTTPException(status_code=400, detail="Email already exists")
 
-@router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
+@router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"], dependencies=[Depends(rate_limit("login"))])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
-        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
     user = await UserService.login_user(session, form_data.username, form_data.password)
     if user:
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
 
         access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
+            data={"sub": user.email, "uid": str(user.id), "role": str(user.role.name), "ver": user.token_version},
             expires_delta=access_token_expires
         )
+        refresh_token = await RefreshTokenService.issue(session, user.id)
+        await UserService.commit_login(session, user)
 
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
-@router.post("/login/", include_in_schema=False, response_model=TokenResponse, tags=["Login and Registration"])
+@router.post("/login/", include_in_schema=False, response_model=TokenResponse, tags=["Login and Registration"], dependencies=[Depends(rate_limit("login"))])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
-        raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
-
     user = await UserService.login_user(session, form_data.username, form_data.password)
     if user:
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
 
         access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
+            data={"sub": user.email, "uid": str(user.id), "role": str(user.role.name), "ver": user.token_version},
             expires_delta=access_token_expires
         )
+        refresh_token = await RefreshTokenService.issue(session, user.id)
+        await UserService.commit_login(session, user)
 
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
 
-@router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"])
+@router.post("/token/refresh", response_model=TokenResponse, tags=["Login and Registration"])
+async def refresh_access_token(body: RefreshTokenRequest, session: AsyncSession = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    The presented refresh token is single-use: presenting it a second time revokes every
+    token issued from the same login.
+    """
+    user, refresh_token = await RefreshTokenService.rotate(session, body.refresh_token)
+    await session.commit()
+    access_token = create_access_token(
+        data={"sub": user.email, "uid": str(user.id), "role": str(user.role.name), "ver": user.token_version},
+        expires_delta=timedelta(minutes=settings.access_token_expire_minutes)
+    )
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+@router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"], dependencies=[Depends(rate_limit("verify_email"))])
 async def verify_email(user_id: UUID, token: str, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
     """
     Verify user's email with a provided token.
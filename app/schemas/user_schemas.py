@@ -1,11 +1,12 @@
 from builtins import ValueError, any, bool, str
 from pydantic import BaseModel, EmailStr, Field, validator, root_validator
-from typing import Optional, List
-from datetime import datetime
+from typing import Dict, Literal, Optional, List
+from datetime import date, datetime
 from enum import Enum
 import uuid
 import re
 from app.models.user_model import UserRole
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname
 
 
@@ -99,6 +100,51 @@ class UserListResponse(BaseModel):
         "linkedin_profile_url": "https://linkedin.com/in/johndoe", 
         "github_profile_url": "https://github.com/johndoe"
     }])
-    total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    total: Optional[int] = Field(..., example=100, description="Total matches; null when count=none")
+    total_mode: str = Field("exact", example="exact", description="How total was produced: exact, estimated, cached or none")
+    page: Optional[int] = Field(None, example=1, description="Page number in offset mode; not set in cursor mode")
     size: int = Field(..., example=10)
+    links: List[PaginationLink] = []
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page in cursor mode")
+    prev_cursor: Optional[str] = Field(None, description="Opaque cursor for the previous page in cursor mode")
+    highlights: Dict[uuid.UUID, str] = Field({}, description="Match snippets by user id when highlight is requested with q")
+
+class UserImportError(BaseModel):
+    row: int = Field(..., example=3, description="1-based record number in the upload (CSV header excluded)")
+    email: Optional[str] = Field(None, example="john.doe@example.com")
+    error: str = Field(..., example="Email already exists.")
+
+class UserImportReport(BaseModel):
+    imported: int = Field(..., example=998)
+    failed: int = Field(..., example=2)
+    errors: List[UserImportError] = []
+    errors_truncated: bool = Field(False, description="True when more rows failed than the report lists")
+
+class UserBulkFilters(BaseModel):
+    """The search_users filter set, selecting the users a bulk action applies to."""
+    email: Optional[str] = None
+    nickname: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: Optional[UserRole] = None
+    is_locked: Optional[bool] = None
+    is_professional: Optional[bool] = None
+    registered_from: Optional[date] = None
+    registered_to: Optional[date] = None
+    q: Optional[str] = None
+
+class UserBulkUpdateRequest(BaseModel):
+    action: Literal["lock", "unlock", "set_role", "set_professional"] = Field(..., example="unlock")
+    ids: Optional[List[uuid.UUID]] = Field(None, max_length=10000, description="Users to change; give either ids or filters")
+    filters: Optional[UserBulkFilters] = Field(None, description="Change every user matching these filters; {} matches everyone")
+    role: Optional[UserRole] = Field(None, example="AUTHENTICATED", description="Target role for set_role")
+    is_professional: Optional[bool] = Field(None, description="Target status for set_professional")
+    dry_run: bool = Field(False, description="Only count the users that would change")
+    chunk_size: Optional[int] = Field(None, ge=1, le=50000, description="Users changed per statement; defaults to bulk_update_chunk_size")
+
+class UserBulkUpdateResponse(BaseModel):
+    action: str = Field(..., example="unlock")
+    dry_run: bool = Field(False)
+    matched: int = Field(..., example=1200, description="Users that would change (dry run) or did change")
+    updated: int = Field(..., example=1200)
+    chunks: int = Field(..., example=1)
@@ -1,5 +1,9 @@
 # app/services/jwt_service.py
 from builtins import dict, str
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
 import jwt
 from datetime import datetime, timedelta
 from settings.config import settings
@@ -20,3 +24,58 @@ def decode_token(token: str):
         return decoded
     except jwt.PyJWTError:
         return None
+
+class TokenClaimsCache:
+    """
+    Bounded LRU cache of verified token claims.
+
+    Entries are keyed by a SHA-256 digest of the token, so raw tokens are never kept in memory,
+    and are evicted once the token's ``exp`` claim has passed.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict):
+        expires_at = claims.get("exp")
+        if self.max_size <= 0 or expires_at is None:
+            return
+        key = self._key(token)
+        self._entries[key] = (claims, float(expires_at))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+token_claims_cache = TokenClaimsCache(settings.jwt_claims_cache_size)
+
+def decode_token_cached(token: str):
+    """Like decode_token, but serves repeat presentations of a still-valid token from token_claims_cache."""
+    claims = token_claims_cache.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        if claims is not None:
+            token_claims_cache.put(token, claims)
+    return claims
@@ -0,0 +1,107 @@
+from builtins import classmethod, str
+from datetime import datetime, timedelta, timezone
+import hashlib
+import secrets
+import logging
+import uuid
+from typing import Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_settings
+from app.models.refresh_token_model import RefreshToken
+from app.models.user_model import User
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class RefreshTokenService:
+    """
+    Issues and rotates opaque refresh tokens.
+
+    Renewing a session costs one indexed lookup on the token digest rather than a bcrypt verify.
+    Each rotation marks the presented token as used and issues a new token in the same family;
+    presenting a used token again revokes the whole family.
+
+    Issuing and rotating only stage their writes; the caller commits them together with the rest of
+    the request's unit of work. Rejections commit the revocations they make before raising.
+    """
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    @classmethod
+    async def issue(cls, session: AsyncSession, user_id: UUID, family_id: Optional[UUID] = None) -> str:
+        """Adds a new refresh token to the session, for the caller to commit, and returns it."""
+        token = secrets.token_urlsafe(32)
+        session.add(RefreshToken(
+            family_id=family_id or uuid.uuid4(),
+            user_id=user_id,
+            token_hash=cls._digest(token),
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expire_minutes),
+        ))
+        return token
+
+    @classmethod
+    async def revoke_family(cls, session: AsyncSession, family_id: UUID):
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        await session.execute(query)
+        await session.commit()
+
+    @classmethod
+    async def revoke_user(cls, session: AsyncSession, user_id: UUID):
+        """Revokes every live refresh token of a user in the caller's transaction, which commits it."""
+        query = (
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, token: str) -> Tuple[User, str]:
+        """
+        Exchanges a refresh token for a new one in the same family. The claim and the new token are
+        left uncommitted for the caller.
+
+        :return: The token's user (with email, role and id loaded) and the new refresh token.
+        :raises HTTPException: 401 if the token is unknown, expired, revoked or reused; 403 if the account is locked.
+        """
+        invalid_token = HTTPException(status_code=401, detail="Invalid or expired refresh token.")
+        query = (
+            select(RefreshToken, User)
+            .join(User, User.id == RefreshToken.user_id)
+            .where(RefreshToken.token_hash == cls._digest(token))
+        )
+        row = (await session.execute(query)).first()
+        if row is None:
+            raise invalid_token
+        record, user = row
+        now = datetime.now(timezone.utc)
+        if record.revoked_at is not None or record.expires_at <= now:
+            raise invalid_token
+
+        # Claim the token atomically so two concurrent refreshes cannot both succeed.
+        claimed = await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.id == record.id, RefreshToken.used_at.is_(None))
+            .values(used_at=now)
+            .returning(RefreshToken.id)
+        )
+        if claimed.scalar() is None:
+            logger.warning(f"Refresh token reuse detected for user {user.id}; revoking token family {record.family_id}.")
+            await cls.revoke_family(session, record.family_id)
+            raise invalid_token
+
+        if user.is_locked:
+            await cls.revoke_family(session, record.family_id)
+            raise HTTPException(status_code=403, detail="Your account is locked due to too many failed login attempts.")
+
+        new_token = await cls.issue(session, user.id, record.family_id)
+        return user, new_token
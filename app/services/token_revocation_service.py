@@ -0,0 +1,192 @@
+from builtins import Exception, bool, dict, int, max, str
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+from uuid import UUID
+import asyncpg
+from sqlalchemy import Select, Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.models.user_model import User
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "user_token_revocations"
+
+class TokenRevocationRegistry:
+    """
+    Compact in-memory view of which access tokens are no longer valid.
+
+    Maps a user id to the lowest ``token_version`` still accepted, and keeps the ids of deleted
+    users in a revoked set. Entries are keyed by id rather than email so that a later account
+    registered with a deleted user's email is not affected. Checks are plain dict lookups, so they
+    can run on every request. Entries are dropped once every token they could reject has expired.
+    """
+
+    def __init__(self, retention_seconds: float, overlap_seconds: float = 0.0):
+        self.retention_seconds = retention_seconds
+        self.overlap_seconds = overlap_seconds
+        self._min_versions: dict = {}
+        self._revoked: dict = {}
+        self._watermark: Optional[datetime] = None
+
+    def is_revoked(self, user_id: str, version: int) -> bool:
+        if user_id in self._revoked:
+            return True
+        entry = self._min_versions.get(user_id)
+        return entry is not None and version < entry[0]
+
+    def apply(self, user_id: UUID, token_version: int):
+        """Records that tokens of this user with a version below ``token_version`` are revoked."""
+        entry = self._min_versions.get(str(user_id))
+        if token_version > (entry[0] if entry else 0):
+            self._min_versions[str(user_id)] = (token_version, time.monotonic())
+
+    def revoke(self, user_id: UUID):
+        """Records that every token of this (deleted) user is revoked."""
+        self._revoked[str(user_id)] = time.monotonic()
+
+    def prune(self):
+        cutoff = time.monotonic() - self.retention_seconds
+        self._min_versions = {k: v for k, v in self._min_versions.items() if v[1] >= cutoff}
+        self._revoked = {k: v for k, v in self._revoked.items() if v >= cutoff}
+
+    async def refresh(self, session: AsyncSession):
+        """
+        Pulls token version bumps committed since the last refresh, e.g. by other workers.
+
+        ``updated_at`` is the writing transaction's start time, so a bump can commit with a
+        timestamp below the watermark; each poll therefore rereads the last ``overlap_seconds``.
+        Reapplying a bump is a no-op, and notifications cover transactions longer than that.
+        """
+        if self._watermark is None:
+            since = datetime.now(timezone.utc) - timedelta(seconds=self.retention_seconds)
+        else:
+            since = self._watermark - timedelta(seconds=self.overlap_seconds)
+        query = (
+            select(User.id, User.token_version, User.updated_at)
+            .where(User.token_version > 0, User.updated_at > since)
+        )
+        rows = (await session.execute(query)).all()
+        for row in rows:
+            self.apply(row.id, row.token_version)
+        if rows:
+            self._watermark = max([row.updated_at for row in rows] + ([self._watermark] if self._watermark else []))
+        elif self._watermark is None:
+            self._watermark = since
+        self.prune()
+
+    def handle_notification(self, payload: str):
+        message = json.loads(payload)
+        if message.get("deleted"):
+            self.revoke(message["id"])
+        else:
+            self.apply(message["id"], message["version"])
+
+    def clear(self):
+        self._min_versions.clear()
+        self._revoked.clear()
+        self._watermark = None
+
+    def __len__(self) -> int:
+        return len(self._min_versions) + len(self._revoked)
+
+token_revocation_registry = TokenRevocationRegistry(
+    retention_seconds=settings.access_token_expire_minutes * 60,
+    overlap_seconds=settings.token_revocation_poll_overlap_seconds,
+)
+
+def revocation_notification(user_id: UUID, version: Optional[int] = None, deleted: bool = False):
+    """Builds the ``pg_notify`` call that tells other workers about a bump or deletion."""
+    payload = {"id": str(user_id)}
+    if deleted:
+        payload["deleted"] = True
+    else:
+        payload["version"] = version
+    return select(func.pg_notify(REVOCATION_CHANNEL, json.dumps(payload)))
+
+def revocation_notifications(rows: Iterable) -> Select:
+    """Like :func:`revocation_notification` for many bumps (rows with id and token_version), in one statement."""
+    payloads = [json.dumps({"id": str(row.id), "version": row.token_version}) for row in rows]
+    return select(func.pg_notify(REVOCATION_CHANNEL, func.unnest(bindparam("payloads", payloads, type_=ARRAY(Text)))))
+
+
+class TokenRevocationSync:
+    """
+    Keeps ``token_revocation_registry`` current across workers.
+
+    Every transaction that bumps a token version or deletes a user sends a notification on
+    ``REVOCATION_CHANNEL``, applied here as it arrives; a poll by ``updated_at`` catches up on any
+    bump a worker missed while its listener was disconnected.
+
+    The listener holds a dedicated connection to ``listen_url``, outside the pool: a pooled
+    connection is handed to requests between polls and may be replaced by the pool without the
+    listener being added again, and PgBouncer in transaction mode does not deliver notifications.
+    Each poll runs in its own short session.
+    """
+
+    def __init__(self, registry: TokenRevocationRegistry, poll_seconds: float, listen_url: str, session_factory=None):
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self.listen_url = listen_url
+        self._session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+        self._listen_connection: Optional[asyncpg.Connection] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            self.registry.handle_notification(payload)
+        except Exception as e:
+            logger.error(f"Ignoring malformed token revocation notification {payload!r}: {e}")
+
+    async def _listen(self) -> asyncpg.Connection:
+        dsn = make_url(self.listen_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        connection = await asyncpg.connect(dsn)
+        await connection.add_listener(REVOCATION_CHANNEL, self._on_notification)
+        return connection
+
+    async def _run(self):
+        session_factory = self._session_factory or Database.get_session_factory()
+        while True:
+            try:
+                self._listen_connection = await self._listen()
+                while True:
+                    async with session_factory() as session:
+                        await self.registry.refresh(session)
+                    await asyncio.sleep(self.poll_seconds)
+                    # Fails once the listening connection is lost, so the listener is added again on a new one.
+                    await self._listen_connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Token revocation sync failed, retrying: {e}")
+            finally:
+                if self._listen_connection is not None:
+                    self._listen_connection.terminate()
+                    self._listen_connection = None
+            await asyncio.sleep(self.poll_seconds)
+
+token_revocation_sync = TokenRevocationSync(
+    token_revocation_registry,
+    poll_seconds=settings.token_revocation_poll_seconds,
+    listen_url=settings.token_revocation_listen_url or settings.database_url,
+)
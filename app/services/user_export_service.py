@@ -0,0 +1,81 @@
+from builtins import classmethod, dict, int, str
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import Row, select
+from app.dependencies import get_settings
+from app.models.user_model import User
+from app.repositories.user_repository import USER_VIEW_COLUMNS
+from app.services.user_service import UserService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Everything a UserResponse carries plus account state; never password hashes or verification tokens.
+EXPORT_COLUMNS = USER_VIEW_COLUMNS + (User.email_verified, User.is_locked, User.professional_status_updated_at)
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+def encode_ndjson(rows: Sequence[Row]) -> bytes:
+    return "".join(
+        json.dumps({key: _plain(value) for key, value in row._mapping.items()}) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+def encode_csv(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([["" if value is None else _plain(value) for value in row] for row in rows])
+    return buffer.getvalue().encode("utf-8")
+
+
+class UserExportService:
+    @classmethod
+    async def stream_users(
+        cls,
+        session_factory,
+        export_format: str,
+        filters: Optional[Dict] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams the users matching ``filters`` (the search_users filter set) as NDJSON or CSV, in no
+        particular order.
+
+        Rows come from a server-side cursor, ``batch_size`` at a time, and each batch is encoded into
+        one chunk, so memory stays flat however many users match. The session is opened here rather
+        than taken from a request dependency: the response body is sent after dependencies have
+        exited. It should come from a snapshot factory, whose transaction keeps the cursor open and
+        the export consistent.
+        """
+        encode = encode_csv if export_format == "csv" else encode_ndjson
+        query = (
+            select(*EXPORT_COLUMNS)
+            .where(*UserService._build_search_filters(**(filters or {})))
+            .execution_options(yield_per=batch_size or settings.user_export_batch_size)
+        )
+        exported = 0
+        async with session_factory() as session:
+            result = await session.stream(query)
+            if export_format == "csv":
+                yield encode_csv([[column.key for column in EXPORT_COLUMNS]])
+            async for partition in result.partitions():
+                exported += len(partition)
+                yield encode(partition)
+        logger.info(f"User export finished: {exported} rows")
@@ -0,0 +1,308 @@
+from builtins import bool, classmethod, dict, int, len, str
+import codecs
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_settings
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import UserCreate
+from app.services.email_service import EmailService
+from app.services.user_service import user_cache
+from app.utils.nickname_gen import generate_nicknames
+from app.utils.security import generate_verification_token, hash_passwords_async
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-seq": "ndjson",
+    "text/csv": "csv",
+}
+
+
+class InvalidImportFormat(ValueError):
+    """Raised when the upload is not NDJSON or CSV, or its header cannot be read."""
+
+
+class ImportRow(NamedTuple):
+    number: int
+    data: Dict[str, Any]
+
+
+class ImportReport:
+    """
+    Counts imported and failed rows and keeps the first ``max_errors`` row errors. A batch checks its
+    rows in several passes, so its errors are held until :meth:`flush` and then listed in row order.
+    """
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._batch_errors: List[Dict[str, Any]] = []
+
+    def fail(self, row: int, error: str, email: Any = None):
+        self.failed += 1
+        self._batch_errors.append({"row": row, "email": email if isinstance(email, str) else None, "error": error})
+
+    def flush(self):
+        room = self.max_errors - len(self.errors)
+        self.errors.extend(sorted(self._batch_errors, key=lambda error: error["row"])[:max(room, 0)])
+        self._batch_errors = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_format(content_type: Optional[str]) -> str:
+    """Maps a request Content-Type to an import format, ignoring parameters such as charset."""
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise InvalidImportFormat(
+            f"Unsupported content type '{media_type}'. Use {', '.join(sorted(IMPORT_FORMATS))}."
+        )
+    return IMPORT_FORMATS[media_type]
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decodes a byte stream as UTF-8 and yields it line by line without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    """Yields one row per non-blank line; lines that are not JSON objects become ``data=None`` rows."""
+    number = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        yield ImportRow(number, data if isinstance(data, dict) else None)
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ImportRow]:
+    """
+    Yields one row per CSV record, keyed by the header line. Quoted fields may span lines, so lines
+    are accumulated until the quotes balance before a record is parsed. Empty cells become None.
+    """
+    header: Optional[List[str]] = None
+    record = ""
+    number = 0
+    async for line in _lines(chunks):
+        record += line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        number += 1
+        if len(values) != len(header):
+            yield ImportRow(number, None)
+            continue
+        yield ImportRow(number, {name: (value if value != "" else None) for name, value in zip(header, values)})
+    if record.strip():
+        number += 1
+        yield ImportRow(number, None)
+    if header is None:
+        raise InvalidImportFormat("CSV upload is missing its header line.")
+
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+class UserImportService:
+    @classmethod
+    async def import_users(
+        cls,
+        session: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        content_type: Optional[str],
+        email_service: Optional[EmailService] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Imports users from an NDJSON or CSV byte stream.
+
+        Rows are validated with ``UserCreate`` and processed ``batch_size`` at a time: one query each
+        checks the batch's emails and nicknames, passwords are hashed on the bulk hashing pool and the
+        batch is inserted with a single multi-row ``INSERT ... ON CONFLICT DO NOTHING`` and committed,
+        so a failure late in a large file keeps the batches already imported. Hashing dominates the
+        cost; ``user_import_bcrypt_rounds`` can lower it, and login upgrades those hashes later.
+
+        Like ``POST /users/``, imported users start as ANONYMOUS with a verification token;
+        verification emails are only sent when an ``email_service`` is given.
+
+        :return: A report with the imported and failed counts and the per-row errors.
+        """
+        parse = parse_csv if import_format(content_type) == "csv" else parse_ndjson
+        batch_size = batch_size or settings.user_import_batch_size
+        report = ImportReport(settings.user_import_max_errors)
+        seen_emails: Set[str] = set()
+        seen_nicknames: Set[str] = set()
+
+        batch: List[ImportRow] = []
+        async for row in parse(chunks):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await cls._import_batch(session, batch, report, seen_emails, seen_nicknames, email_service)
+                report.flush()
+                batch = []
+        if batch:
+            await cls._import_batch(session, batch, report, seen_emails, seen_nicknames, email_service)
+            report.flush()
+
+        logger.info(f"User import finished: {report.imported} imported, {report.failed} failed")
+        return report.as_dict()
+
+    @classmethod
+    async def _import_batch(
+        cls,
+        session: AsyncSession,
+        batch: List[ImportRow],
+        report: ImportReport,
+        seen_emails: Set[str],
+        seen_nicknames: Set[str],
+        email_service: Optional[EmailService],
+    ):
+        valid: List[Tuple[int, Dict[str, Any]]] = []
+        for row in batch:
+            if row.data is None:
+                report.fail(row.number, "Row could not be parsed.")
+                continue
+            row.data.setdefault("role", UserRole.ANONYMOUS.name)
+            try:
+                user = UserCreate(**row.data).model_dump()
+            except ValidationError as e:
+                report.fail(row.number, _error_message(e), row.data.get("email"))
+                continue
+            if user["email"] in seen_emails:
+                report.fail(row.number, "Email appears more than once in the upload.", user["email"])
+                continue
+            if user["nickname"] and user["nickname"] in seen_nicknames:
+                report.fail(row.number, "Nickname appears more than once in the upload.", user["email"])
+                continue
+            seen_emails.add(user["email"])
+            if user["nickname"]:
+                seen_nicknames.add(user["nickname"])
+            valid.append((row.number, user))
+
+        taken_emails = await cls._existing(session, User.email, [user["email"] for _, user in valid])
+        taken_nicknames = await cls._existing(session, User.nickname, [user["nickname"] for _, user in valid if user["nickname"]])
+        accepted = []
+        for number, user in valid:
+            if user["email"] in taken_emails:
+                report.fail(number, "Email already exists.", user["email"])
+            elif user["nickname"] in taken_nicknames:
+                report.fail(number, "Nickname already exists.", user["email"])
+            else:
+                accepted.append((number, user))
+
+        accepted = await cls._assign_nicknames(session, accepted, report, seen_nicknames)
+        if not accepted:
+            return
+
+        hashed = await hash_passwords_async(
+            [user.pop("password") for _, user in accepted], settings.user_import_bcrypt_rounds or None
+        )
+        values = []
+        for (_, user), hashed_password in zip(accepted, hashed):
+            user.update(
+                hashed_password=hashed_password,
+                role=UserRole.ANONYMOUS,
+                verification_token=generate_verification_token(),
+            )
+            values.append(user)
+
+        # Rows raced in by a concurrent writer are skipped by ON CONFLICT and reported below.
+        result = await session.execute(
+            insert(User.__table__).on_conflict_do_nothing().returning(User.id, User.email), values
+        )
+        inserted = {email: user_id for user_id, email in result.all()}
+        await session.commit()
+        for _, user in accepted:
+            if user["email"] in inserted:
+                user_cache.invalidate(inserted[user["email"]], user["email"], user["nickname"])
+
+        report.imported += len(inserted)
+        for number, user in accepted:
+            if user["email"] not in inserted:
+                report.fail(number, "Email or nickname already exists.", user["email"])
+            elif email_service is not None:
+                await email_service.send_verification_email(User(
+                    id=inserted[user["email"]],
+                    email=user["email"],
+                    first_name=user["first_name"],
+                    verification_token=user["verification_token"],
+                ))
+
+    @classmethod
+    async def _existing(cls, session: AsyncSession, column, values: List[str]) -> Set[str]:
+        """Returns which of ``values`` are already stored in ``column``, in one query."""
+        if not values:
+            return set()
+        result = await session.execute(select(column).where(column.in_(values)))
+        return set(result.scalars().all())
+
+    @classmethod
+    async def _assign_nicknames(
+        cls,
+        session: AsyncSession,
+        accepted: List[Tuple[int, Dict[str, Any]]],
+        report: ImportReport,
+        seen_nicknames: Set[str],
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """Draws generated nicknames for rows without one, checking each round of candidates in one query."""
+        pending = [user for _, user in accepted if not user["nickname"]]
+        for _ in range(settings.nickname_allocation_attempts):
+            if not pending:
+                break
+            candidates = [
+                nickname for nickname in generate_nicknames(len(pending) + settings.nickname_candidate_batch)
+                if nickname not in seen_nicknames
+            ]
+            taken = await cls._existing(session, User.nickname, candidates)
+            free = [nickname for nickname in candidates if nickname not in taken]
+            for user, nickname in zip(pending, free):
+                user["nickname"] = nickname
+                seen_nicknames.add(nickname)
+            pending = pending[len(free):]
+
+        assigned = []
+        for number, user in accepted:
+            if user["nickname"]:
+                assigned.append((number, user))
+            else:
+                report.fail(number, "Could not generate a unique nickname.", user["email"])
+        return assigned
@@ -1,19 +1,29 @@
 from builtins import Exception, bool, classmethod, int, str
+from collections import OrderedDict
 from datetime import datetime, timezone
 from fastapi import HTTPException
+import json
 import secrets
-from typing import Optional, Dict, List
+import time
+from typing import Optional, Dict, List, NamedTuple, Sequence, Union
 from pydantic import ValidationError
-from sqlalchemy import func, null, update, select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import DateTime, Row, String, any_, bindparam, case, delete, false, func, literal_column, null, text, true, tuple_, update, select
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_email_service, get_settings
 from app.models.user_model import User
+from app.repositories.user_repository import USER_VIEW_COLUMNS, UserRepository
 from app.schemas.user_schemas import UserCreate, UserUpdate
-from app.utils.nickname_gen import generate_nickname
-from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.nickname_gen import generate_nickname, generate_nicknames
+from app.utils.pagination_cursor import InvalidCursor, cursor_value, decode_cursor, encode_cursor
+from app.utils.security import (
+    PasswordHashPoolBusy, generate_verification_token, hash_password_async, password_needs_rehash, verify_password_async
+)
 from uuid import UUID
 from app.services.email_service import EmailService
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.token_revocation_service import revocation_notification, revocation_notifications, token_revocation_registry
 from app.models.user_model import UserRole
 import logging
 from datetime import date
@@ -23,14 +33,302 @@ logger = logging.getLogger(__name__)
 
 from sqlalchemy import and_
 
+# Allowlist of sortable fields
+SORT_COLUMNS = {
+    "email": User.email,
+    "nickname": User.nickname,
+    "created_at": User.created_at,
+    "updated_at": User.updated_at,
+    "first_name": User.first_name,
+    "last_name": User.last_name
+}
+
+COUNT_MODES = ("exact", "estimated", "none", "cached")
+
+class UserPage(NamedTuple):
+    """
+    One page of search results. ``total`` is None in "none" count mode and ``total_mode`` says how it was
+    produced. Cursors are only set in keyset mode, and only when that page exists. ``highlights`` maps
+    user ids to full-text match snippets when they were requested. ``users`` holds rows of
+    USER_VIEW_COLUMNS when the search was projected.
+    """
+    total: Optional[int]
+    users: List[Union[User, Row]]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    total_mode: str = "exact"
+    highlights: Optional[Dict[UUID, str]] = None
+
+class BulkUpdateResult(NamedTuple):
+    """Outcome of a bulk update: ``matched`` users would change (dry run) or ``updated`` did, over ``chunks`` statements."""
+    matched: int
+    updated: int = 0
+    chunks: int = 0
+
+# Unique indexes on users and the message a clash on each is reported with.
+UNIQUE_VIOLATION_DETAILS = {
+    "ix_users_email": "Email is already in use.",
+    "ix_users_nickname": "Nickname is already in use.",
+}
+
+def _unique_violation_detail(error: IntegrityError) -> Optional[str]:
+    """The 400 message for a unique index violation, or None for any other integrity error."""
+    # asyncpg's own exception is the cause of the DBAPI error and names the violated index.
+    constraint = getattr(error.orig.__cause__, "constraint_name", None)
+    return UNIQUE_VIOLATION_DETAILS.get(constraint)
+
+BULK_ACTIONS = ("lock", "unlock", "set_role", "set_professional")
+
+def _bulk_changes(action: str, role: Optional[UserRole] = None, is_professional: Optional[bool] = None) -> tuple:
+    """
+    The SET values of a bulk action and the predicate selecting the users it would actually change.
+    Rows already in the target state are skipped, which keeps counts honest, makes reruns no-ops and
+    lets chunked runs make progress. Every action increments ``version``; locking, unlocking and role
+    changes also revoke existing tokens.
+    """
+    bump = User.token_version + 1
+    version = User.version + 1
+    if action == "lock":
+        return {"is_locked": True, "token_version": bump, "version": version}, User.is_locked.isnot(True)
+    if action == "unlock":
+        values = {"is_locked": False, "failed_login_attempts": 0, "token_version": bump, "version": version}
+        return values, User.is_locked.is_(True)
+    if action == "set_role":
+        if role is None:
+            raise HTTPException(status_code=400, detail="role is required for set_role.")
+        return {"role": role, "token_version": bump, "version": version}, User.role != role
+    if action == "set_professional":
+        if is_professional is None:
+            raise HTTPException(status_code=400, detail="is_professional is required for set_professional.")
+        values = {"is_professional": is_professional, "professional_status_updated_at": func.now(), "version": version}
+        return values, User.is_professional.is_distinct_from(is_professional)
+    raise HTTPException(status_code=400, detail=f"Unsupported bulk action. Use one of: {', '.join(BULK_ACTIONS)}.")
+
+class SearchCountCache:
+    """Bounded TTL cache of search totals keyed by the normalized filter set."""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, tuple[int, float]]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        total, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return total
+
+    def put(self, key: tuple, total: int):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (total, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+search_count_cache = SearchCountCache(settings.search_count_cache_ttl_seconds, settings.search_count_cache_size)
+
+USER_CACHE_KEYS = ("id", "email", "nickname")
+
+# Returned by UserCache.get when the cache knows nothing; None means "known not to exist".
+USER_CACHE_MISS = object()
+
+class UserCache:
+    """
+    Bounded TTL+LRU cache of USER_VIEW_COLUMNS rows, looked up by id, email or nickname.
+
+    Rows are immutable, so one cached row is safely shared by every request. Lookups that found no
+    user are remembered as negative entries with their own, shorter TTL, which absorbs storms of
+    logins or lookups for addresses that do not exist. Writes in this process invalidate what they
+    touch; writes by other workers show up once the entries expire.
+
+    Each invalidation bumps ``generation``. A lookup reads it before querying and passes it to
+    :meth:`put`, which drops the result if a write invalidated entries in the meantime, so a read
+    racing a write cannot cache the row as it was before the write.
+    """
+
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_size = max_size
+        self.generation = 0
+        self._rows: "OrderedDict[UUID, tuple[Row, float]]" = OrderedDict()
+        self._ids: Dict[tuple, UUID] = {}
+        self._missing: "OrderedDict[tuple, float]" = OrderedDict()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.hits = self.negative_hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key: str, value):
+        """Returns the cached row, None for a known-missing user, or USER_CACHE_MISS."""
+        now = time.monotonic()
+        user_id = value if key == "id" else self._ids.get((key, value))
+        entry = self._rows.get(user_id) if user_id is not None else None
+        if entry is not None:
+            row, expires_at = entry
+            if now < expires_at:
+                self._rows.move_to_end(user_id)
+                self.hits += 1
+                return row
+            self._drop(user_id)
+        expires_at = self._missing.get((key, value))
+        if expires_at is not None:
+            if now < expires_at:
+                self.negative_hits += 1
+                return None
+            del self._missing[(key, value)]
+        self.misses += 1
+        return USER_CACHE_MISS
+
+    def is_missing(self, key: str, value) -> bool:
+        """Whether a lookup by ``key`` recently found no user; counts only negative hits."""
+        expires_at = self._missing.get((key, value))
+        if expires_at is None or time.monotonic() >= expires_at:
+            return False
+        self.negative_hits += 1
+        return True
+
+    def put(self, key: str, value, row: Optional[Row], generation: int):
+        """Caches a lookup result, unless an invalidation happened since ``generation`` was read."""
+        if self.max_size <= 0 or generation != self.generation:
+            return
+        if row is None:
+            if self.negative_ttl_seconds > 0:
+                self._missing[(key, value)] = time.monotonic() + self.negative_ttl_seconds
+                self._missing.move_to_end((key, value))
+                self._trim(self._missing, lambda: self._missing.popitem(last=False))
+            return
+        if self.ttl_seconds <= 0:
+            return
+        self._drop(row.id)
+        self._rows[row.id] = (row, time.monotonic() + self.ttl_seconds)
+        self._ids[("email", row.email)] = row.id
+        self._ids[("nickname", row.nickname)] = row.id
+        self._trim(self._rows, lambda: self._drop(next(iter(self._rows))))
+
+    def invalidate(self, user_id: Optional[UUID] = None, email: Optional[str] = None, nickname: Optional[str] = None):
+        """
+        Forgets the user with ``user_id`` and whatever is cached under ``email`` and ``nickname``.
+        Pass the new email and nickname after a write that may have taken them, so negative entries
+        for them do not outlive the write.
+        """
+        self.generation += 1
+        self.invalidations += 1
+        for key, value in (("id", user_id), ("email", email), ("nickname", nickname)):
+            if value is None:
+                continue
+            self._missing.pop((key, value), None)
+            self._drop(value if key == "id" else self._ids.get((key, value)))
+
+    def _drop(self, user_id: Optional[UUID]):
+        entry = self._rows.pop(user_id, None) if user_id is not None else None
+        if entry is not None:
+            row = entry[0]
+            for index_key in (("email", row.email), ("nickname", row.nickname)):
+                if self._ids.get(index_key) == user_id:
+                    del self._ids[index_key]
+
+    def _trim(self, entries: OrderedDict, evict_oldest):
+        while len(entries) > self.max_size:
+            evict_oldest()
+            self.evictions += 1
+
+    def clear(self):
+        self.generation += 1
+        self._rows.clear()
+        self._ids.clear()
+        self._missing.clear()
+        self._reset_counters()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._rows),
+            "negative_size": len(self._missing),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._missing)
+
+user_cache = UserCache(
+    settings.user_cache_ttl_seconds, settings.user_cache_negative_ttl_seconds, settings.user_cache_size
+)
+
+# One array parameter rather than an expanding IN list, so every batch reuses one prepared statement.
+_TAKEN_NICKNAMES = select(User.__table__.c.nickname).where(
+    User.__table__.c.nickname == any_(bindparam("candidates", type_=ARRAY(String)))
+)
+
+# Inlined rather than bound: _estimate_total renders filters with literal_binds, and REGCONFIG has
+# no literal renderer.
+SEARCH_CONFIG = literal_column("'simple'::regconfig", type_=REGCONFIG)
+
+def _text_query(q: str):
+    # websearch syntax: quoted phrases, OR, and -exclusions; never raises on malformed input.
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+def _contains(column, term: str):
+    """
+    Case-insensitive substring match, served by the column's pg_trgm GIN index. Trigram indexes need
+    three characters to be selective, so shorter terms match as a prefix instead.
+    """
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"{escaped}%" if len(term) < 3 else f"%{escaped}%"
+    return column.ilike(pattern, escape="\\")
+
+def _keyset_order(column, descending: bool) -> list:
+    # A unique sort key needs no tiebreaker, which keeps its single-column index usable as is.
+    keys = [column] if column.expression.unique else [column, User.id]
+    return [key.desc() if descending else key.asc() for key in keys]
+
+def _keyset_segments(column, value, row_id: UUID, descending: bool) -> list:
+    """
+    Predicates selecting the rows after (value, row_id) in _keyset_order, in the order they are read.
+    NULL sort keys order as the largest values (PostgreSQL's default), so a scan can cross from the
+    non-NULL rows into the NULL rows or the other way; each side is a separate index range.
+    """
+    if column.expression.unique:
+        return [column < value if descending else column > value]
+    if value is None:
+        if descending:
+            return [and_(column.is_(None), User.id < row_id), column.isnot(None)]
+        return [and_(column.is_(None), User.id > row_id)]
+    key, boundary = tuple_(column, User.id), tuple_(value, row_id)
+    if descending:
+        return [key < boundary]
+    return [key > boundary, column.is_(None)] if column.expression.nullable else [key > boundary]
+
+# Advisory lock key serializing the first-admin bootstrap ("user" in ASCII).
+FIRST_ADMIN_LOCK_KEY = 0x75736572
+
 class UserService:
+    # Set once any user is known to exist; see _role_for_new_user.
+    _users_exist = False
 
     @classmethod
-    async def search_users(
+    def _build_search_filters(
         cls,
-        session: AsyncSession,
-        skip: int = 0,
-        limit: int = 10,
         email: Optional[str] = None,
         nickname: Optional[str] = None,
         role: Optional[UserRole] = None,
@@ -38,63 +336,232 @@ class UserService:
         is_professional: Optional[bool] = None,
         registered_from: Optional[date] = None,
         registered_to: Optional[date] = None,
-        sort_by: str = "created_at",
-        order: str = "desc"
-    ) -> tuple[int, List[User]]:
-
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> list:
         filters = []
 
+        if q:
+            filters.append(User.search_vector.bool_op("@@")(_text_query(q)))
+
         if email:
-            filters.append(User.email.ilike(f"%{email}%"))
+            filters.append(_contains(User.email, email))
         if nickname:
-            filters.append(User.nickname.ilike(f"%{nickname}%"))
+            filters.append(_contains(User.nickname, nickname))
+        if first_name:
+            filters.append(_contains(User.first_name, first_name))
+        if last_name:
+            filters.append(_contains(User.last_name, last_name))
         if role:
             filters.append(User.role == role)
+        # Boolean filters are rendered as literals so the planner can match the partial indexes
+        # (WHERE is_locked / WHERE is_professional) even when the statement is prepared generically.
         if is_locked is not None:
-            filters.append(User.is_locked == is_locked)
+            filters.append(User.is_locked == (true() if is_locked else false()))
         if is_professional is not None:
-            filters.append(User.is_professional == is_professional)
+            filters.append(User.is_professional == (true() if is_professional else false()))
         if registered_from:
             filters.append(User.created_at >= registered_from)
         if registered_to:
             filters.append(User.created_at <= registered_to)
+        return filters
 
-        # Allowlist of sortable fields
-        sort_columns = {
-            "email": User.email,
-            "nickname": User.nickname,
-            "created_at": User.created_at,
-            "updated_at": User.updated_at,
-            "first_name": User.first_name,
-            "last_name": User.last_name
-        }
+    @classmethod
+    async def search_users(
+        cls,
+        session: AsyncSession,
+        skip: int = 0,
+        limit: int = 10,
+        email: Optional[str] = None,
+        nickname: Optional[str] = None,
+        role: Optional[UserRole] = None,
+        is_locked: Optional[bool] = None,
+        is_professional: Optional[bool] = None,
+        registered_from: Optional[date] = None,
+        registered_to: Optional[date] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        keyset: bool = False,
+        count_mode: str = "exact",
+        q: Optional[str] = None,
+        highlight: bool = False,
+        projected: bool = False
+    ) -> UserPage:
+        """
+        Filtered, sorted page of users. Offset mode uses skip/limit; keyset mode (``keyset=True`` or a
+        ``cursor``) seeks past the cursor's (sort key, id) so every page costs the same as the first.
+
+        ``q`` is a full-text query over nickname, names and bio that combines with the other filters.
+        With ``q`` the default sort is "relevance" (ts_rank, offset mode only), and ``highlight`` adds
+        ts_headline snippets for the returned page.
+
+        ``projected`` reads only USER_VIEW_COLUMNS into plain rows, for callers that only serialize users.
 
+        ``count_mode`` chooses how the total is produced: "exact" counts every match (in offset mode with
+        a window function on the page query itself), "estimated" uses the planner's row estimate,
+        "cached" reuses a recent exact count for the same filters, and "none" skips it.
+        """
+        filters = cls._build_search_filters(
+            email, nickname, role, is_locked, is_professional, registered_from, registered_to, first_name, last_name, q
+        )
+        count_mode = count_mode if count_mode in COUNT_MODES else "exact"
+        # ilike matching is case-insensitive, so the cache key can be too.
+        filter_key = (
+            email.lower() if email else None, nickname.lower() if nickname else None, role.value if role else None,
+            is_locked, is_professional, registered_from, registered_to,
+            first_name.lower() if first_name else None, last_name.lower() if last_name else None, q
+        )
+
+        if sort_by is None or (sort_by == "relevance" and not q):
+            sort_by = "relevance" if q else "created_at"
         # Fallback to created_at if sort_by is invalid
-        sort_column = sort_columns.get(sort_by, User.created_at)
-        sort_expr = sort_column.desc() if order.lower() == "desc" else sort_column.asc()
+        sort_by = sort_by if sort_by in SORT_COLUMNS or sort_by == "relevance" else "created_at"
+        order = "desc" if order.lower() == "desc" else "asc"
 
         try:
-            query = select(User).where(and_(*filters)).order_by(sort_expr).offset(skip).limit(limit)
-            total_query = select(func.count()).select_from(User).where(and_(*filters))
+            if keyset or cursor is not None:
+                if sort_by == "relevance":
+                    raise HTTPException(status_code=400, detail="Cursor pagination is not available when sorting by relevance.")
+                page = await cls._search_by_cursor(session, filters, sort_by, order, limit, cursor, projected)
+                total = await cls._count_total(session, filters, filter_key, count_mode)
+                highlights = await cls._highlights(session, q, page.users) if highlight and q else None
+                return page._replace(total=total, total_mode=count_mode, highlights=highlights)
 
-            result = await cls._execute_query(session, query)
-            total_result = await session.execute(total_query)
+            if sort_by == "relevance":
+                rank = func.ts_rank(User.search_vector, _text_query(q))
+                ordering = [rank.desc() if order == "desc" else rank.asc(), User.id]
+            else:
+                sort_column = SORT_COLUMNS[sort_by]
+                ordering = [sort_column.desc() if order == "desc" else sort_column.asc()]
+            entities = USER_VIEW_COLUMNS if projected else (User,)
+            query = select(*entities).where(and_(*filters)).order_by(*ordering).offset(skip).limit(limit)
 
-            users = result.scalars().all() if result else []
-            total_count = total_result.scalar()
+            if count_mode == "exact":
+                # The window count is computed over every match before OFFSET/LIMIT apply: one query.
+                result = await cls._execute_query(session, query.add_columns(func.count().over().label("total")))
+                rows = result.all() if result else []
+                users = rows if projected else [row[0] for row in rows]
+                if rows:
+                    total = rows[0].total
+                else:
+                    # Past the last page no row carries the count.
+                    total = await cls._count_total(session, filters, filter_key, count_mode) if skip else 0
+            else:
+                result = await cls._execute_query(session, query)
+                users = (result.all() if projected else result.scalars().all()) if result else []
+                total = await cls._count_total(session, filters, filter_key, count_mode)
 
-            return total_count, users
+            highlights = await cls._highlights(session, q, users) if highlight and q else None
+            return UserPage(total, users, total_mode=count_mode, highlights=highlights)
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Search users failed: {e}")
-            return 0, []
+            return UserPage(0, [])
+
+    @classmethod
+    async def _search_by_cursor(
+        cls, session: AsyncSession, filters: list, sort_by: str, order: str, limit: int, cursor: Optional[str],
+        projected: bool = False
+    ) -> UserPage:
+        sort_column = SORT_COLUMNS[sort_by]
+        backwards = False
+        segments = [None]
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except InvalidCursor:
+                raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+            if position["s"] != sort_by or position["o"] != order:
+                raise HTTPException(status_code=400, detail="Pagination cursor does not match sort_by and order.")
+            backwards = position["d"] == "prev"
+            value = cursor_value(position["v"], isinstance(sort_column.type, DateTime))
+            # A "prev" cursor reads the opposite way from the boundary row, then restores display order.
+            segments = _keyset_segments(sort_column, value, position["id"], (order == "desc") != backwards)
+
+        ordering = _keyset_order(sort_column, (order == "desc") != backwards)
+        users = []
+        for segment in segments:
+            query = select(*(USER_VIEW_COLUMNS if projected else (User,))).where(and_(*filters))
+            if segment is not None:
+                query = query.where(segment)
+            result = await cls._execute_query(session, query.order_by(*ordering).limit(limit + 1 - len(users)))
+            if result:
+                users.extend(result.all() if projected else result.scalars().all())
+            if len(users) > limit:
+                break
+        has_more = len(users) > limit
+        users = users[:limit]
+        if backwards:
+            users.reverse()
+
+        more_after = True if backwards else has_more
+        more_before = has_more if backwards else bool(cursor)
+
+        def boundary(user: Union[User, Row], direction: str) -> str:
+            return encode_cursor(sort_by, order, getattr(user, sort_by), user.id, direction)
+
+        return UserPage(
+            None,
+            users,
+            next_cursor=boundary(users[-1], "next") if users and more_after else None,
+            prev_cursor=boundary(users[0], "prev") if users and more_before else None,
+        )
+
+    @classmethod
+    async def _highlights(cls, session: AsyncSession, q: str, users: List[User]) -> Dict[UUID, str]:
+        """ts_headline snippets for one page; computed for the page's rows only, as headlines are costly."""
+        if not users:
+            return {}
+        document = func.concat_ws(" ", User.nickname, User.first_name, User.last_name, User.bio)
+        headline = func.ts_headline(
+            SEARCH_CONFIG, document, _text_query(q), "StartSel=<mark>, StopSel=</mark>, MaxFragments=2"
+        )
+        query = select(User.id, headline).where(User.id.in_([user.id for user in users]))
+        result = await cls._execute_query(session, query)
+        return dict(result.all()) if result else {}
+
+    @classmethod
+    async def _count_total(cls, session: AsyncSession, filters: list, filter_key: tuple, count_mode: str) -> Optional[int]:
+        if count_mode == "none":
+            return None
+        if count_mode == "estimated":
+            return await cls._estimate_total(session, filters)
+        if count_mode == "cached":
+            total = search_count_cache.get(filter_key)
+            if total is not None:
+                return total
+        total = (await session.execute(select(func.count()).select_from(User).where(and_(*filters)))).scalar()
+        if count_mode == "cached":
+            search_count_cache.put(filter_key, total)
+        return total
+
+    @classmethod
+    async def _estimate_total(cls, session: AsyncSession, filters: list) -> int:
+        """Planner row estimate: pg_class.reltuples when unfiltered, otherwise EXPLAIN of the filtered scan."""
+        if not filters:
+            reltuples = (await session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+            )).scalar()
+            if reltuples is not None and reltuples >= 0:  # -1 until the table is first analyzed
+                return int(reltuples)
+        query = select(User.id).where(and_(*filters))
+        compiled = query.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+        plan = (await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
     @classmethod
     async def _execute_query(cls, session: AsyncSession, query):
+        # Runs inside the caller's unit of work; methods that write commit once when they are done.
         try:
-            result = await session.execute(query)
-            await session.commit()
-            return result
+            return await session.execute(query)
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
             await session.rollback()
@@ -110,6 +577,33 @@ class UserService:
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
         return await cls._fetch_user(session, id=user_id)
 
+    @classmethod
+    async def get_user_view(cls, session: AsyncSession, user_id: UUID) -> Optional[Row]:
+        """
+        Reads only the columns a UserResponse needs, as a plain row (no identity map or unit of work).
+        Served from ``user_cache`` when possible, like the other ``get_user_view_by_*`` lookups.
+        """
+        return await cls._cached_view(session, "id", user_id)
+
+    @classmethod
+    async def get_user_view_by_email(cls, session: AsyncSession, email: str) -> Optional[Row]:
+        return await cls._cached_view(session, "email", email)
+
+    @classmethod
+    async def get_user_view_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[Row]:
+        return await cls._cached_view(session, "nickname", nickname)
+
+    @classmethod
+    async def _cached_view(cls, session: AsyncSession, key: str, value) -> Optional[Row]:
+        cached = user_cache.get(key, value)
+        if cached is not USER_CACHE_MISS:
+            return cached
+        generation = user_cache.generation
+        lookup = {"id": UserRepository.get_by_id, "email": UserRepository.get_by_email, "nickname": UserRepository.get_by_nickname}[key]
+        row = await lookup(session, value)
+        user_cache.put(key, value, row, generation)
+        return row
+
     @classmethod
     async def get_by_nickname(cls, session: AsyncSession, nickname: str) -> Optional[User]:
         return await cls._fetch_user(session, nickname=nickname)
@@ -118,43 +612,80 @@ class UserService:
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
         return await cls._fetch_user(session, email=email)
 
+    @classmethod
+    async def allocate_nickname(cls, session: AsyncSession) -> str:
+        """
+        Returns a generated nickname that is not taken yet. Candidates are checked a batch at a time
+        with one IN query, so even a mostly full namespace costs a round trip or two, not one per
+        candidate. Raises 503 if every batch is taken, which only happens near full occupancy.
+        """
+        for _ in range(settings.nickname_allocation_attempts):
+            candidates = generate_nicknames(settings.nickname_candidate_batch)
+            taken = set((await session.execute(_TAKEN_NICKNAMES, {"candidates": candidates})).scalars())
+            free = [nickname for nickname in candidates if nickname not in taken]
+            if free:
+                return free[0]
+        logger.error("No free generated nickname found; raise nickname_number_digits to widen the namespace.")
+        raise HTTPException(status_code=503, detail="Could not generate a nickname. Please choose one.")
+
+    @classmethod
+    async def _role_for_new_user(cls, session: AsyncSession) -> UserRole:
+        """
+        The first user of an empty database becomes ADMIN, everyone after that ANONYMOUS. Once users
+        are known to exist the answer is cached for the life of the process, so regular creations
+        skip the check. Until then, a transaction-scoped advisory lock serializes concurrent first
+        creations, so only one of them can see an empty table.
+        """
+        if cls._users_exist:
+            return UserRole.ANONYMOUS
+        await session.execute(select(func.pg_advisory_xact_lock(FIRST_ADMIN_LOCK_KEY)))
+        if await cls.count(session) > 0:
+            cls._users_exist = True
+            return UserRole.ANONYMOUS
+        return UserRole.ADMIN
+
+    @classmethod
+    async def _insert_user(cls, session: AsyncSession, values: Dict) -> Optional[User]:
+        """Inserts a user and returns it, or None when a unique column (email or nickname) is already taken."""
+        query = insert(User).values(**values).on_conflict_do_nothing().returning(User)
+        return (await session.execute(query)).scalars().first()
+
     @classmethod
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
+        """
+        Creates a user with a single INSERT ... ON CONFLICT DO NOTHING RETURNING and a commit. The
+        unique indexes decide whether the email and nickname are free; only when the insert is
+        skipped does a lookup find out which one clashed.
+        """
         try:
             validated_data = UserCreate(**user_data).model_dump()
-
-            existing_user = await cls.get_by_email(session, validated_data['email'])
-            if existing_user:
-                logger.error("User with given email already exists.")
-                raise HTTPException(status_code=400, detail="Email already exists.")
-
-            # Check for provided nickname
             provided_nickname = validated_data.get('nickname')
-            if provided_nickname:
-                if await cls.get_by_nickname(session, provided_nickname):
-                    raise HTTPException(status_code=400, detail="Nickname already exists. Please try a different one.")
-                nickname = provided_nickname
-            else:
-                nickname = generate_nickname()
-                while await cls.get_by_nickname(session, nickname):
-                    nickname = generate_nickname()
-
-            validated_data['nickname'] = nickname
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-
-            new_user = User(**validated_data)
-
-            user_count = await cls.count(session)
-            new_user.role = UserRole.ADMIN if user_count == 0 else UserRole.ANONYMOUS
+            validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
 
-            if new_user.role == UserRole.ADMIN:
-                new_user.email_verified = True
+            validated_data['role'] = await cls._role_for_new_user(session)
+            if validated_data['role'] == UserRole.ADMIN:
+                validated_data['email_verified'] = True
             else:
-                new_user.verification_token = generate_verification_token()
+                validated_data['verification_token'] = generate_verification_token()
+
+            # A generated nickname is tried as is: the namespace is wide enough that it is almost always
+            # free, and a clash only costs a retry with a batch-checked one.
+            validated_data['nickname'] = provided_nickname or generate_nickname()
+            new_user = await cls._insert_user(session, validated_data)
+            if new_user is None:
+                if await UserRepository.get_by_email(session, validated_data['email']):
+                    logger.error("User with given email already exists.")
+                    raise HTTPException(status_code=400, detail="Email already exists.")
+                if provided_nickname:
+                    raise HTTPException(status_code=400, detail="Nickname already exists. Please try a different one.")
+                validated_data['nickname'] = await cls.allocate_nickname(session)
+                new_user = await cls._insert_user(session, validated_data)
+                if new_user is None:
+                    raise HTTPException(status_code=503, detail="Could not generate a nickname. Please choose one.")
 
-            session.add(new_user)
             await session.commit()
-            await session.refresh(new_user)  # Ensure user.id is available
+            cls._users_exist = True
+            user_cache.invalidate(new_user.id, new_user.email, new_user.nickname)
 
             # ✅ Now it's safe to send the verification email
             if new_user.role != UserRole.ADMIN:
@@ -171,6 +702,9 @@ class UserService:
             logger.warning(f"User creation failed: {ve.detail}")
             raise ve
 
+        except PasswordHashPoolBusy:
+            raise
+
         except Exception as e:
             logger.exception("Unexpected error during user creation")
             raise HTTPException(status_code=500, detail="An unexpected error occurred during user creation.")
@@ -178,35 +712,86 @@ class UserService:
 
 
     @classmethod
-    async def update(cls, session: AsyncSession, user_id: UUID, update_data: Dict[str, str]) -> Optional[User]:
+    async def update(
+        cls,
+        session: AsyncSession,
+        user_id: UUID,
+        update_data: Dict[str, str],
+        expected_versions: Optional[Sequence[int]] = None,
+    ) -> Optional[User]:
+        """
+        Applies the changes with a single UPDATE ... RETURNING and a commit, incrementing the user's
+        ``version``. The unique indexes decide whether a new email or nickname is free; a clash is
+        reported with the same 400 the old lookups produced.
+
+        With ``expected_versions`` (from an If-Match header) the UPDATE only matches the user while
+        its version is one of them, so a concurrent edit is detected without a read or a row lock
+        held across the request.
+
+        :return: The updated user, or None when no user matched (missing, or, with
+            ``expected_versions``, changed since it was read) or the data is invalid.
+        """
         try:
-            # validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
             validated_data = UserUpdate(**update_data).model_dump(exclude_unset=True)
 
             if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
+                validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+            role_changed = 'role' in validated_data
+            if role_changed:
+                # The enum, not its name, so a loaded copy of the user synchronized from these values
+                # holds a UserRole like one read from the database.
+                validated_data['role'] = UserRole[validated_data['role']]
+                # A role change revokes tokens that still carry the old role.
+                validated_data['token_version'] = case(
+                    (User.role != validated_data['role'], User.token_version + 1), else_=User.token_version
+                )
+            validated_data['version'] = User.version + 1
+            conditions = [User.id == user_id]
+            if expected_versions is not None:
+                conditions.append(User.version.in_(expected_versions))
+            query = update(User).where(*conditions).values(**validated_data).returning(User)
+            try:
+                result = await session.execute(query, execution_options={"populate_existing": True})
+            except IntegrityError as e:
+                await session.rollback()
+                detail = _unique_violation_detail(e)
+                if detail is None:
+                    raise
+                raise HTTPException(status_code=400, detail=detail)
+            updated_user = result.scalars().first()
+            if updated_user and role_changed:
+                # Re-announcing an unchanged version is harmless; other workers keep the highest.
+                await session.execute(
+                    revocation_notification(updated_user.id, updated_user.token_version)
+                )
+            await session.commit()
             if updated_user:
-                session.refresh(updated_user)  # Explicitly refresh the updated user object
+                user_cache.invalidate(updated_user.id, updated_user.email, updated_user.nickname)
+                if role_changed:
+                    token_revocation_registry.apply(updated_user.id, updated_user.token_version)
                 logger.info(f"User {user_id} updated successfully.")
                 return updated_user
-            else:
-                logger.error(f"User {user_id} not found after update attempt.")
+            logger.info(f"User with ID {user_id} not found.")
             return None
+        except (HTTPException, PasswordHashPoolBusy):
+            raise
         except Exception as e:  # Broad exception handling for debugging
             logger.error(f"Error during user update: {e}")
             return None
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if not user:
+        """Deletes the user with one DELETE ... RETURNING; refresh tokens go with it by ON DELETE CASCADE."""
+        query = delete(User).where(User.id == user_id).returning(User.id, User.email)
+        result = await cls._execute_query(session, query)
+        deleted = result.first() if result else None
+        if not deleted:
             logger.info(f"User with ID {user_id} not found.")
             return False
-        await session.delete(user)
+        await session.execute(revocation_notification(deleted.id, deleted=True))
         await session.commit()
+        user_cache.invalidate(deleted.id)
+        token_revocation_registry.revoke(deleted.id)
         return True
 
     @classmethod
@@ -222,30 +807,79 @@ class UserService:
 
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if not user.email_verified:
-                raise HTTPException(status_code=403, detail="Email not verified. Please check your inbox for a verification link.")
+        """
+        Checks the credentials and records the outcome. A successful login is left uncommitted so
+        the caller can add its refresh token and finish with :meth:`commit_login`, one commit for
+        the request; failed attempts are committed before the error is raised.
+        """
+        # An email recently found not to exist is refused without a query, which absorbs storms of
+        # attempts against unknown addresses.
+        if user_cache.is_missing("email", email):
+            raise HTTPException(status_code=401, detail="Incorrect email or password.")
+        # Fetch only what the checks need; the outcome is then recorded with one atomic UPDATE.
+        generation = user_cache.generation
+        query = select(User.id, User.hashed_password, User.email_verified, User.is_locked).where(User.email == email)
+        credentials = (await session.execute(query)).first()
+        if credentials is None:
+            user_cache.put("email", email, None, generation)
+        if credentials:
+            if credentials.is_locked:
+                raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
 
-            if user.is_locked:
-                raise HTTPException(status_code=403, detail="Your account is locked due to too many failed login attempts.")
+            if not credentials.email_verified:
+                raise HTTPException(status_code=403, detail="Email not verified. Please check your inbox for a verification link.")
 
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
+            if await verify_password_async(password, credentials.hashed_password):
+                values = {"failed_login_attempts": 0, "last_login_at": datetime.now(timezone.utc)}
+                if password_needs_rehash(credentials.hashed_password):
+                    # Upgrade the stored hash to the current cost factor while we hold the plain password.
+                    values["hashed_password"] = await hash_password_async(password)
+                # A burst of failures may have locked the account while the password was checked;
+                # the lock must stand, so a locked row is not updated and the login is refused.
+                query = (
+                    update(User)
+                    .where(User.id == credentials.id, User.is_locked.isnot(True))
+                    .values(**values)
+                    .returning(User)
+                )
+                result = await session.execute(query, execution_options={"populate_existing": True})
+                user = result.scalars().first()
+                if user is None:
+                    raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
                 return user
             else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
+                # Increment and lock in the database so concurrent failures are counted exactly;
+                # once the account is locked further attempts no longer match the row.
+                attempts = func.coalesce(User.failed_login_attempts, 0) + 1
+                locks_now = attempts >= settings.max_login_attempts
+                query = (
+                    update(User)
+                    .where(User.id == credentials.id, User.is_locked.isnot(True))
+                    .values(
+                        failed_login_attempts=attempts,
+                        is_locked=locks_now,
+                        token_version=case((locks_now, User.token_version + 1), else_=User.token_version),
+                    )
+                    .returning(User.failed_login_attempts, User.is_locked, User.token_version)
+                )
+                outcome = (await session.execute(query)).first()
+                if outcome and outcome.is_locked:
+                    await session.execute(revocation_notification(credentials.id, outcome.token_version))
                 await session.commit()
+                user_cache.invalidate(credentials.id)
+                if outcome and outcome.is_locked:
+                    token_revocation_registry.apply(credentials.id, outcome.token_version)
+                    logger.warning(f"Account {email} locked after {outcome.failed_login_attempts} failed login attempts.")
 
         raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
 
+    @classmethod
+    async def commit_login(cls, session: AsyncSession, user: User):
+        """Commits a login staged by :meth:`login_user` (and whatever the caller added) in one go."""
+        await session.commit()
+        user_cache.invalidate(user.id)
+
     @classmethod
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
         user = await cls.get_by_email(session, email)
@@ -254,14 +888,20 @@ class UserService:
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
-        hashed_password = hash_password(new_password)
+        hashed_password = await hash_password_async(new_password)
         user = await cls.get_by_id(session, user_id)
         if user:
             user.hashed_password = hashed_password
             user.failed_login_attempts = 0  # Resetting failed login attempts
             user.is_locked = False  # Unlocking the user account, if locked
+            user.token_version = (user.token_version or 0) + 1  # Sessions from before the reset are revoked
             session.add(user)
+            # Refresh tokens would otherwise mint access tokens carrying the new version.
+            await RefreshTokenService.revoke_user(session, user.id)
+            await session.execute(revocation_notification(user.id, user.token_version))
             await session.commit()
+            user_cache.invalidate(user.id)
+            token_revocation_registry.apply(user.id, user.token_version)
             return True
         return False
 
@@ -275,9 +915,12 @@ class UserService:
             # ✅ Only update role if user was previously anonymous
             if user.role == UserRole.ANONYMOUS:
                 user.role = UserRole.AUTHENTICATED
+            # The role may change, so an ETag read before verification must no longer match.
+            user.version = User.version + 1
 
             session.add(user)
             await session.commit()
+            user_cache.invalidate(user.id)
             return True
         return False
 
@@ -294,13 +937,95 @@ class UserService:
         count = result.scalar()
         return count
     
+    @classmethod
+    async def bulk_update(
+        cls,
+        session: AsyncSession,
+        action: str,
+        ids: Optional[List[UUID]] = None,
+        filters: Optional[Dict] = None,
+        role: Optional[UserRole] = None,
+        is_professional: Optional[bool] = None,
+        dry_run: bool = False,
+        chunk_size: Optional[int] = None,
+        exclude_subject: Optional[str] = None,
+    ) -> BulkUpdateResult:
+        """
+        Applies one admin action to every user in ``ids`` or matching ``filters`` (the search_users
+        filter set), with set-based statements instead of a fetch and commit per user.
+
+        Users are updated ``chunk_size`` at a time, in id order, each chunk being a single
+        ``UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING`` committed on its own, so row locks
+        are held briefly and an interrupted run keeps its progress. A dry run only counts the users
+        that would change. ``exclude_subject`` (the acting admin's token subject) is never touched.
+
+        :return: A BulkUpdateResult with the matched or updated count.
+        """
+        if (ids is None) == (filters is None):
+            raise HTTPException(status_code=400, detail="Provide either ids or filters.")
+        values, changes = _bulk_changes(action, role, is_professional)
+        conditions = [changes]
+        if ids is not None:
+            conditions.append(User.id.in_(ids))
+        else:
+            conditions.extend(cls._build_search_filters(**filters))
+        if exclude_subject:
+            conditions.append(User.email != exclude_subject)
+            try:
+                conditions.append(User.id != UUID(exclude_subject))
+            except ValueError:
+                pass
+
+        if dry_run:
+            matched = (await session.execute(select(func.count()).select_from(User).where(*conditions))).scalar()
+            return BulkUpdateResult(matched=matched)
+
+        chunk_size = chunk_size or settings.bulk_update_chunk_size
+        updated = chunks = 0
+        last_id = None
+        while True:
+            chunk = select(User.id).where(*conditions).order_by(User.id).limit(chunk_size)
+            if last_id is not None:
+                chunk = chunk.where(User.id > last_id)
+            query = (
+                update(User)
+                .where(User.id.in_(chunk.scalar_subquery()))
+                .values(**values)
+                .returning(User.id, User.token_version)
+                .execution_options(synchronize_session=False)
+            )
+            rows = (await session.execute(query)).all()
+            if rows and "token_version" in values:
+                await session.execute(revocation_notifications(rows))
+            await session.commit()
+            for row in rows:
+                user_cache.invalidate(row.id)
+            if not rows:
+                break
+            chunks += 1
+            updated += len(rows)
+            if "token_version" in values:
+                for row in rows:
+                    token_revocation_registry.apply(row.id, row.token_version)
+            if len(rows) < chunk_size:
+                break
+            last_id = max(row.id for row in rows)
+
+        logger.info(f"Bulk {action} updated {updated} users in {chunks} chunks.")
+        return BulkUpdateResult(matched=updated, updated=updated, chunks=chunks)
+
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
         user = await cls.get_by_id(session, user_id)
         if user and user.is_locked:
             user.is_locked = False
             user.failed_login_attempts = 0  # Optionally reset failed login attempts
+            user.token_version = (user.token_version or 0) + 1
+            user.version = User.version + 1
             session.add(user)
+            await session.execute(revocation_notification(user.id, user.token_version))
             await session.commit()
+            user_cache.invalidate(user.id)
+            token_revocation_registry.apply(user.id, user.token_version)
             return True
         return False
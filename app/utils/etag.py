@@ -0,0 +1,28 @@
+"""
+Entity tags for optimistic concurrency.
+
+A user's ETag is its row ``version`` in quotes. Clients send it back in ``If-Match`` so an update
+only applies to the version they read.
+"""
+from builtins import int, str
+from typing import List, Optional
+
+
+def format_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(header: str) -> Optional[List[int]]:
+    """
+    Returns the versions an If-Match header accepts, or None for ``*`` (any current version).
+    If-Match uses strong comparison, so weak (``W/``) and unrecognised tags never match and are
+    left out; a header with none left matches nothing.
+    """
+    if header.strip() == "*":
+        return None
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    return versions
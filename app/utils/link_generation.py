@@ -1,6 +1,6 @@
 from builtins import dict, int, max, str
-from typing import List, Callable
-from urllib.parse import urlencode
+from typing import List, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 from uuid import UUID
 
 from fastapi import Request
@@ -11,10 +11,19 @@ from app.schemas.pagination_schema import PaginationLink
 def create_link(rel: str, href: str, method: str = "GET", action: str = None) -> Link:
     return Link(rel=rel, href=href, method=method, action=action)
 
+def _url_with_params(base_url: str, params: dict) -> str:
+    # Keeps the request's other query parameters (filters, sort); a None value removes a parameter.
+    parsed = urlparse(base_url)
+    query = dict(parse_qsl(parsed.query, keep_blank_values=True))
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
 def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationLink:
-    # Ensure parameters are added in a specific order
-    query_string = f"skip={params['skip']}&limit={params['limit']}"
-    return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
+    return PaginationLink(rel=rel, href=_url_with_params(base_url, params))
 
 def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     """
@@ -30,19 +39,40 @@ def create_user_links(user_id: UUID, request: Request) -> List[Link]:
         for rel, action, method, action_desc in actions
     ]
 
-def generate_pagination_links(request: Request, skip: int, limit: int, total_items: int) -> List[PaginationLink]:
+def generate_pagination_links(
+    request: Request, skip: int, limit: int, total_items: Optional[int], has_next: Optional[bool] = None
+) -> List[PaginationLink]:
+    """Offset links. Without an exact total there is no "last" link and ``has_next`` decides "next"."""
     base_url = str(request.url)
-    total_pages = (total_items + limit - 1) // limit
     links = [
         create_pagination_link("self", base_url, {'skip': skip, 'limit': limit}),
-        create_pagination_link("first", base_url, {'skip': 0, 'limit': limit}),
-        create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit})
+        create_pagination_link("first", base_url, {'skip': 0, 'limit': limit})
     ]
+    if total_items is not None:
+        total_pages = (total_items + limit - 1) // limit
+        links.append(create_pagination_link("last", base_url, {'skip': max(0, (total_pages - 1) * limit), 'limit': limit}))
+        has_next = skip + limit < total_items
 
-    if skip + limit < total_items:
+    if has_next:
         links.append(create_pagination_link("next", base_url, {'skip': skip + limit, 'limit': limit}))
 
     if skip > 0:
         links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
 
     return links
+
+def generate_cursor_links(request: Request, limit: int, next_cursor: Optional[str], prev_cursor: Optional[str]) -> List[PaginationLink]:
+    """Links for keyset pagination: next/prev carry the opaque cursor and are omitted at either end."""
+    base_url = str(request.url)
+    links = [
+        create_pagination_link("self", base_url, {'limit': limit}),
+        create_pagination_link("first", base_url, {'cursor': None, 'skip': None, 'pagination': 'cursor', 'limit': limit})
+    ]
+
+    if next_cursor:
+        links.append(create_pagination_link("next", base_url, {'cursor': next_cursor, 'skip': None, 'limit': limit}))
+
+    if prev_cursor:
+        links.append(create_pagination_link("prev", base_url, {'cursor': prev_cursor, 'skip': None, 'limit': limit}))
+
+    return links
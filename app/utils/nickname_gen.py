@@ -1,10 +1,37 @@
-from builtins import str
+from builtins import int, len, min, set, str
 import random
+from typing import List, Optional
+from settings.config import settings
 
+ADJECTIVES = [
+    "clever", "jolly", "brave", "sly", "gentle", "bold", "calm", "eager", "fancy", "happy", "keen", "lively",
+    "merry", "nimble", "proud", "quick", "quiet", "witty", "zesty", "sunny", "swift", "tidy", "vivid", "wise",
+    "bright", "cosmic", "daring", "fuzzy", "grand", "humble", "lucky", "mighty",
+]
+ANIMALS = [
+    "panda", "fox", "raccoon", "koala", "lion", "otter", "badger", "beaver", "bison", "camel", "cheetah", "dolphin",
+    "eagle", "falcon", "gecko", "heron", "ibis", "jaguar", "lemur", "lynx", "marmot", "moose", "newt", "owl",
+    "penguin", "puffin", "quokka", "rabbit", "seal", "tiger", "walrus", "yak",
+]
 
-def generate_nickname() -> str:
-    """Generate a URL-safe nickname using adjectives and animal names."""
-    adjectives = ["clever", "jolly", "brave", "sly", "gentle"]
-    animals = ["panda", "fox", "raccoon", "koala", "lion"]
-    number = random.randint(0, 999)
-    return f"{random.choice(adjectives)}_{random.choice(animals)}_{number}"
+
+def nickname_namespace_size(digits: Optional[int] = None) -> int:
+    """Number of distinct nicknames generate_nickname can produce with ``digits`` trailing digits."""
+    digits = settings.nickname_number_digits if digits is None else digits
+    return len(ADJECTIVES) * len(ANIMALS) * 10 ** digits
+
+
+def generate_nickname(digits: Optional[int] = None) -> str:
+    """Generate a URL-safe nickname using adjectives, animal names and a number of up to ``digits`` digits."""
+    digits = settings.nickname_number_digits if digits is None else digits
+    number = random.randrange(10 ** digits)
+    return f"{random.choice(ADJECTIVES)}_{random.choice(ANIMALS)}_{number}"
+
+
+def generate_nicknames(count: int, digits: Optional[int] = None) -> List[str]:
+    """Generate up to ``count`` distinct nicknames (fewer only if the namespace is smaller than ``count``)."""
+    count = min(count, nickname_namespace_size(digits))
+    nicknames = set()
+    while len(nicknames) < count:
+        nicknames.add(generate_nickname(digits))
+    return list(nicknames)
@@ -0,0 +1,45 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor records the sort it belongs to, the sort key and ``id`` of the boundary row, and the
+direction to read in. Clients treat it as an opaque string.
+"""
+import base64
+import json
+from builtins import Exception, dict, str
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, row_id: UUID, direction: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort_by, "o": order, "v": value, "id": str(row_id), "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        payload["id"] = UUID(payload["id"])
+        if payload["d"] not in ("next", "prev") or not isinstance(payload["s"], str):
+            raise InvalidCursor(cursor)
+        return payload
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor(cursor) from e
+
+
+def cursor_value(value: Optional[Any], is_datetime: bool) -> Optional[Any]:
+    """Restores the sort key stored in a cursor to the column's Python type."""
+    if value is None or not is_datetime:
+        return value
+    return datetime.fromisoformat(value)
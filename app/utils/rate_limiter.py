@@ -0,0 +1,190 @@
+# app/utils/rate_limiter.py
+from builtins import Exception, dict, float, int, max, str
+import math
+import time
+from logging import getLogger
+from typing import List, Optional, Tuple
+from sqlalchemy import case, delete
+from sqlalchemy.dialects.postgresql import insert
+from app.database import Database
+from app.models.rate_limit_model import RateLimitCounter
+from settings.config import settings
+
+logger = getLogger(__name__)
+
+# A rule is (key, limit, window_seconds).
+RateLimitRule = Tuple[str, int, int]
+
+
+def _sliding_window_wait(now: float, window_start: float, window_seconds: int, current: int, previous: int, limit: int) -> float:
+    """
+    Applies the sliding-window estimate shared by the backends.
+
+    The previous fixed window's count is weighted by how much of it still overlaps the sliding
+    window ending now.
+
+    Returns:
+        float: 0 if ``current`` hits are within the limit, otherwise the number of seconds until they would be.
+    """
+    previous_weight = 1 - (now - window_start) / window_seconds
+    if previous * previous_weight + current <= limit:
+        return 0.0
+    if current > limit:
+        return window_start + window_seconds - now
+    # Over the limit only because of the previous window: wait until enough of it slides out.
+    excess = previous * previous_weight + current - limit
+    return max(excess / previous * window_seconds, 0.0)
+
+
+class RateLimitBackend:
+    """Storage for rate limit counters."""
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        """
+        Records one hit for ``key``.
+
+        Returns:
+            float: 0 if the hit is within the limit, otherwise the number of seconds until it would be.
+        """
+        raise NotImplementedError
+
+    async def reset(self):
+        """Forgets all recorded hits."""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window counters kept in process memory, suitable for a single worker.
+
+    Each key keeps only the counts of the current and previous fixed windows; the previous
+    window's count is weighted by how much of it still overlaps the sliding window.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._counters: dict = {}
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        now = time.time()
+        window_start = now - (now % window_seconds)
+        current_start, current, previous = self._counters.get(key, (window_start, 0, 0))
+        if current_start != window_start:
+            previous = current if current_start == window_start - window_seconds else 0
+            current = 0
+        current += 1
+        if key not in self._counters and len(self._counters) >= self.max_keys:
+            self._evict(window_start - window_seconds)
+        self._counters[key] = (window_start, current, previous)
+
+        return _sliding_window_wait(now, window_start, window_seconds, current, previous, limit)
+
+    def _evict(self, oldest_useful_start: float):
+        stale = [key for key, (start, _, _) in self._counters.items() if start < oldest_useful_start]
+        for key in stale:
+            del self._counters[key]
+        if len(self._counters) >= self.max_keys:
+            # Every key is live; drop the oldest insertions rather than growing without bound.
+            for key in list(self._counters)[: len(self._counters) // 10 or 1]:
+                del self._counters[key]
+
+    async def reset(self):
+        self._counters.clear()
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    Sliding-window counters in the ``rate_limit_counters`` table, shared by all workers.
+
+    Each hit is a single upsert on its own short connection, independent of the request's session,
+    and applies the same weighting as :class:`InMemoryRateLimitBackend`. Rows whose windows can no
+    longer affect a decision are deleted at most once per ``purge_interval_seconds`` per worker.
+    """
+
+    def __init__(self, session_factory=None, purge_interval_seconds: float = 60.0):
+        self._session_factory = session_factory
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = 0.0
+
+    def _get_session_factory(self):
+        return self._session_factory or Database.get_session_factory()
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> float:
+        now = time.time()
+        window_start = int(now - (now % window_seconds))
+        statement = insert(RateLimitCounter).values(key=key, window_start=window_start, count=1, previous_count=0)
+        excluded = statement.excluded
+        # Postgres evaluates every SET expression against the row as it was before this hit.
+        statement = statement.on_conflict_do_update(
+            index_elements=[RateLimitCounter.key],
+            set_={
+                "count": case(
+                    (RateLimitCounter.window_start == excluded.window_start, RateLimitCounter.count + 1),
+                    else_=1,
+                ),
+                "previous_count": case(
+                    (RateLimitCounter.window_start == excluded.window_start, RateLimitCounter.previous_count),
+                    (RateLimitCounter.window_start == excluded.window_start - window_seconds, RateLimitCounter.count),
+                    else_=0,
+                ),
+                "window_start": excluded.window_start,
+            },
+        ).returning(RateLimitCounter.count, RateLimitCounter.previous_count)
+        async with self._get_session_factory()() as session:
+            current, previous = (await session.execute(statement)).one()
+            if now >= self._next_purge:
+                self._next_purge = now + self.purge_interval_seconds
+                await session.execute(
+                    delete(RateLimitCounter).where(RateLimitCounter.window_start < window_start - window_seconds)
+                )
+            await session.commit()
+        return _sliding_window_wait(now, window_start, window_seconds, current, previous, limit)
+
+    async def reset(self):
+        async with self._get_session_factory()() as session:
+            await session.execute(RateLimitCounter.__table__.delete())
+            await session.commit()
+
+
+class RateLimiter:
+    """Applies a set of rules and reports how long a rejected caller has to wait."""
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+
+    async def check(self, rules: List[RateLimitRule]) -> float:
+        """
+        Records a hit against every rule.
+
+        Returns:
+            float: 0 if every rule allows the hit, otherwise the longest wait in seconds.
+        """
+        retry_after = 0.0
+        for key, limit, window_seconds in rules:
+            if limit <= 0:
+                continue
+            try:
+                retry_after = max(retry_after, await self.backend.hit(key, limit, window_seconds))
+            except Exception as e:
+                # Fail open: an unavailable counter store must not take logins down with it.
+                logger.error(f"Rate limit backend error for {key}: {e}")
+        return retry_after
+
+    async def reset(self):
+        await self.backend.reset()
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Returns the process-wide rate limiter, creating it with the configured backend on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        backends = {"memory": InMemoryRateLimitBackend, "postgres": PostgresRateLimitBackend}
+        if settings.rate_limit_backend not in backends:
+            raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}")
+        _rate_limiter = RateLimiter(backends[settings.rate_limit_backend]())
+    return _rate_limiter
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
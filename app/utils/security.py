@@ -1,19 +1,39 @@
 # app/security.py
 from builtins import Exception, ValueError, bool, int, str
+import asyncio
+import multiprocessing
 import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Optional
 import bcrypt
 from logging import getLogger
+from settings.config import settings
 
 # Set up logging
 logger = getLogger(__name__)
 
-def hash_password(password: str, rounds: int = 12) -> str:
+# Current bcrypt cost factor; replaced by calibrate_bcrypt_rounds() at application startup.
+_bcrypt_rounds: int = settings.bcrypt_rounds
+
+def get_bcrypt_rounds() -> int:
+    """Returns the cost factor new password hashes are created with."""
+    return _bcrypt_rounds
+
+def set_bcrypt_rounds(rounds: int):
+    """Sets the cost factor new password hashes are created with."""
+    global _bcrypt_rounds
+    _bcrypt_rounds = rounds
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """
     Hashes a password using bcrypt with a specified cost factor.
     
     Args:
         password (str): The plain text password to hash.
         rounds (int): The cost factor that determines the computational cost of hashing.
+            Defaults to the current cost factor (see get_bcrypt_rounds()).
 
     Returns:
         str: The hashed password.
@@ -22,13 +42,17 @@ def hash_password(password: str, rounds: int = 12) -> str:
         ValueError: If hashing the password fails.
     """
     try:
-        salt = bcrypt.gensalt(rounds=rounds)
+        salt = bcrypt.gensalt(rounds=rounds if rounds is not None else _bcrypt_rounds)
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed_password.decode('utf-8')
     except Exception as e:
         logger.error("Failed to hash password: %s", e)
         raise ValueError("Failed to hash password") from e
 
+def hash_passwords(passwords: List[str], rounds: Optional[int] = None) -> List[str]:
+    """Hashes a batch of passwords in one call, so a pool worker handles a whole slice per round trip."""
+    return [hash_password(password, rounds) for password in passwords]
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain text password against a hashed password.
@@ -49,5 +73,171 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
 
+def bcrypt_rounds_of(hashed_password: str) -> Optional[int]:
+    """Returns the cost factor embedded in a bcrypt hash, or None if the hash is not in bcrypt format."""
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Checks whether a stored hash was created with a cost factor other than the current one."""
+    return bcrypt_rounds_of(hashed_password) != _bcrypt_rounds
+
+def calibrate_bcrypt_rounds(target_ms: int, min_rounds: int, max_rounds: int) -> int:
+    """
+    Picks the highest bcrypt cost factor whose hashing time stays within a latency budget.
+
+    The hash time is measured at ``min_rounds`` and extrapolated, since every extra round doubles
+    the work. The result is clamped to ``[min_rounds, max_rounds]``.
+
+    Args:
+        target_ms (int): The per-hash latency budget in milliseconds.
+        min_rounds (int): The lowest acceptable cost factor.
+        max_rounds (int): The highest acceptable cost factor.
+
+    Returns:
+        int: The selected cost factor.
+    """
+    salt = bcrypt.gensalt(rounds=min_rounds)
+    samples = []
+    for _ in range(3):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        samples.append((time.perf_counter() - started) * 1000)
+    elapsed_ms = min(samples)
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    logger.info("Calibrated bcrypt cost factor to %s (~%.0f ms per hash)", rounds, elapsed_ms)
+    return rounds
+
 def generate_verification_token():
-    return secrets.token_urlsafe(16)  # Generates a secure 16-byte URL-safe token
\ No newline at end of file
+    return secrets.token_urlsafe(16)  # Generates a secure 16-byte URL-safe token
+
+class PasswordHashPoolBusy(Exception):
+    """Raised when the password hashing pool is saturated or a call exceeds its timeout."""
+
+
+class PasswordHashPool:
+    """
+    Runs bcrypt work in a bounded pool of worker processes so it never blocks the event loop.
+
+    Calls beyond ``size + max_queue`` in flight are rejected immediately instead of queueing
+    without bound, and each call is limited to ``timeout`` seconds. A call that times out while its
+    job is already running keeps its slot until the worker finishes, since the job cannot be
+    stopped; the bound therefore counts every job the workers still owe.
+    """
+
+    def __init__(self, size: int, max_queue: int, timeout: float):
+        self.size = size
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers do not inherit the event loop, sockets or locks of the server process.
+            self._executor = ProcessPoolExecutor(max_workers=self.size, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _release(self):
+        self._in_flight -= 1
+
+    async def run(self, func, *args):
+        if self._in_flight >= self.size + self.max_queue:
+            raise PasswordHashPoolBusy("Password hashing queue is full")
+        loop = asyncio.get_running_loop()
+        job = self._get_executor().submit(func, *args)
+        self._in_flight += 1
+        # Released when the job itself ends (finished, failed, or cancelled before it started),
+        # not when the caller stops waiting. The callback runs on an executor thread.
+        job.add_done_callback(lambda _: self._release_threadsafe(loop))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError as e:
+            logger.error("Password hashing call timed out after %s seconds", self.timeout)
+            raise PasswordHashPoolBusy("Password hashing timed out") from e
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:  # the loop has closed; nothing is waiting on the count any more
+            self._release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_password_hash_pool: Optional[PasswordHashPool] = None
+
+def get_password_hash_pool() -> PasswordHashPool:
+    """Returns the process-wide password hashing pool, creating it from settings on first use."""
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        _password_hash_pool = PasswordHashPool(
+            size=settings.password_hash_pool_size,
+            max_queue=settings.password_hash_max_queue,
+            timeout=settings.password_hash_timeout_seconds,
+        )
+    return _password_hash_pool
+
+_bulk_password_hash_pool: Optional[PasswordHashPool] = None
+
+def get_bulk_password_hash_pool() -> PasswordHashPool:
+    """
+    Returns the pool used for bulk hashing (imports). It is separate from the interactive pool so a
+    large import cannot starve logins and registrations of bcrypt workers.
+    """
+    global _bulk_password_hash_pool
+    if _bulk_password_hash_pool is None:
+        size = settings.bulk_password_hash_pool_size or multiprocessing.cpu_count()
+        _bulk_password_hash_pool = PasswordHashPool(
+            size=size, max_queue=size, timeout=settings.bulk_password_hash_timeout_seconds
+        )
+    return _bulk_password_hash_pool
+
+def shutdown_password_hash_pool():
+    """Stops the worker processes of the password hashing pools, if they were started."""
+    global _password_hash_pool, _bulk_password_hash_pool
+    if _password_hash_pool is not None:
+        _password_hash_pool.shutdown()
+        _password_hash_pool = None
+    if _bulk_password_hash_pool is not None:
+        _bulk_password_hash_pool.shutdown()
+        _bulk_password_hash_pool = None
+
+async def hash_password_async(password: str, rounds: Optional[int] = None) -> str:
+    """Async variant of :func:`hash_password` that runs in the password hashing pool."""
+    # Workers have their own copy of this module, so the current cost factor is passed explicitly.
+    return await get_password_hash_pool().run(hash_password, password, rounds if rounds is not None else _bcrypt_rounds)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Async variant of :func:`verify_password` that runs in the password hashing pool."""
+    return await get_password_hash_pool().run(verify_password, plain_password, hashed_password)
+
+async def calibrate_bcrypt_rounds_async(target_ms: int, min_rounds: int, max_rounds: int) -> int:
+    """Calibrates the bcrypt cost factor in a pool worker and makes it the current cost factor."""
+    rounds = await get_password_hash_pool().run(calibrate_bcrypt_rounds, target_ms, min_rounds, max_rounds)
+    set_bcrypt_rounds(rounds)
+    return rounds
+
+async def hash_passwords_async(passwords: List[str], rounds: Optional[int] = None) -> List[str]:
+    """Hashes many passwords on the bulk pool: one contiguous slice per worker, results in input order."""
+    if not passwords:
+        return []
+    pool = get_bulk_password_hash_pool()
+    rounds = rounds if rounds is not None else _bcrypt_rounds
+    slice_size = -(-len(passwords) // pool.size)
+    slices = [passwords[i:i + slice_size] for i in range(0, len(passwords), slice_size)]
+    hashed = await asyncio.gather(*(pool.run(hash_passwords, chunk, rounds) for chunk in slices))
+    return list(chain.from_iterable(hashed))
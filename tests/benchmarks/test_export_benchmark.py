@@ -0,0 +1,53 @@
+"""
+Benchmark: peak memory of a streamed user export as the row count grows tenfold.
+
+Run with ``pytest tests/benchmarks -s`` to print the comparison.
+"""
+import time
+import tracemalloc
+
+import pytest
+from sqlalchemy import text
+
+from app.database import snapshot_session_factory
+from app.services.user_export_service import UserExportService
+from tests.conftest import engine
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+BATCH_SIZE = 1000
+
+
+async def seed(session, first: int, last: int):
+    await session.execute(text(
+        "INSERT INTO users (id, nickname, email, first_name, bio, role, email_verified, is_locked, hashed_password) "
+        "SELECT gen_random_uuid(), 'export_' || n, 'export_' || n || '@example.com', 'Export', repeat('b', 200), "
+        "'AUTHENTICATED'::\"UserRole\", true, false, 'x' FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS n"
+    ), {"first": first, "last": last})
+    await session.commit()
+
+
+async def measure(export_format: str):
+    factory = snapshot_session_factory(engine)
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = 0
+    async for chunk in UserExportService.stream_users(factory, export_format, batch_size=BATCH_SIZE):
+        rows += chunk.count(b"\n")
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, peak, elapsed
+
+
+async def test_export_memory_stays_flat(db_session):
+    await seed(db_session, 1, 5000)
+    small_rows, small_peak, small_s = await measure("ndjson")
+    await seed(db_session, 5001, 50000)
+    large_rows, large_peak, large_s = await measure("ndjson")
+    print(f"\n{'rows':>8}{'peak KiB':>10}{'seconds':>9}")
+    print(f"{small_rows:>8}{small_peak / 1024:>10.1f}{small_s:>9.2f}")
+    print(f"{large_rows:>8}{large_peak / 1024:>10.1f}{large_s:>9.2f}")
+    assert (small_rows, large_rows) == (5000, 50000)
+    # Ten times the rows may not cost anywhere near ten times the memory.
+    assert large_peak < small_peak * 2
@@ -0,0 +1,85 @@
+"""
+Benchmark: generated-nickname allocation and registration latency at 0%, 50% and 90% namespace
+occupancy, for the old one-query-per-candidate loop and the batched IN check.
+
+The namespace is shrunk to one digit (10,240 names) so it can be filled quickly. Registration runs
+UserService.create with a minimal bcrypt cost so the nickname work is not drowned out by hashing.
+Run with ``pytest tests/benchmarks -s`` to print the comparison.
+"""
+import itertools
+import random
+import time
+
+import pytest
+from sqlalchemy import event, text
+
+from app.repositories.user_repository import UserRepository
+from app.services.user_service import UserService
+from app.utils.nickname_gen import ADJECTIVES, ANIMALS, generate_nickname
+from tests.conftest import engine
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+DIGITS = 1
+ALLOCATIONS = 200
+REGISTRATIONS = 20
+
+
+async def legacy_allocate(session) -> str:
+    nickname = generate_nickname()
+    while await UserRepository.get_by_nickname(session, nickname):
+        nickname = generate_nickname()
+    return nickname
+
+
+async def occupy(session, names):
+    await session.execute(text(
+        "INSERT INTO users (id, nickname, email, role, email_verified, is_locked, hashed_password) "
+        "SELECT gen_random_uuid(), n, n || '@example.com', 'AUTHENTICATED'::\"UserRole\", true, false, 'x' "
+        "FROM unnest(CAST(:names AS text[])) AS n ON CONFLICT DO NOTHING"
+    ), {"names": names})
+    await session.commit()
+    await session.execute(text("ANALYZE users"))  # as autovacuum would after a bulk load
+
+
+async def per_call(allocate, session, statements) -> tuple:
+    before, started = statements[0], time.perf_counter()
+    for _ in range(ALLOCATIONS):
+        await allocate(session)
+    return (time.perf_counter() - started) * 1000 / ALLOCATIONS, (statements[0] - before) / ALLOCATIONS
+
+
+async def test_nickname_allocation_by_occupancy(db_session, email_service, monkeypatch):
+    monkeypatch.setattr("app.utils.nickname_gen.settings.nickname_number_digits", DIGITS)
+    monkeypatch.setattr("app.utils.security._bcrypt_rounds", 4)
+    names = [f"{a}_{b}_{n}" for a, b, n in itertools.product(ADJECTIVES, ANIMALS, range(10 ** DIGITS))]
+    random.shuffle(names)
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        print(f"\n{'occupancy':<10}{'legacy ms':>10}{'queries':>9}{'batched ms':>11}{'queries':>9}{'register ms':>13}")
+        results = {}
+        occupied = 0
+        for share in (0.0, 0.5, 0.9):
+            target = int(len(names) * share)
+            await occupy(db_session, names[occupied:target])
+            occupied = target
+            legacy_ms, legacy_queries = await per_call(legacy_allocate, db_session, statements)
+            batched_ms, batched_queries = await per_call(UserService.allocate_nickname, db_session, statements)
+            started = time.perf_counter()
+            for i in range(REGISTRATIONS):
+                user = await UserService.create(db_session, {
+                    "email": f"register_{share}_{i}@example.com", "password": "Secure*1234", "role": "ANONYMOUS",
+                }, email_service)
+                assert user is not None
+            register_ms = (time.perf_counter() - started) * 1000 / REGISTRATIONS
+            print(f"{share:<10.0%}{legacy_ms:>10.2f}{legacy_queries:>9.2f}{batched_ms:>11.2f}{batched_queries:>9.2f}{register_ms:>13.2f}")
+            results[share] = (legacy_queries, batched_queries)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    assert results[0.9][0] > 5
+    assert results[0.9][1] < 1.5
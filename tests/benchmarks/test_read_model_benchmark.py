@@ -0,0 +1,68 @@
+"""
+Benchmark: full ORM entities versus projected rows for one 100-user page of GET /users/.
+
+Run with ``pytest tests/benchmarks -s`` to print the comparison.
+"""
+import time
+import tracemalloc
+
+import pytest
+
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import UserResponse
+from app.services.user_service import UserService
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+PAGE_SIZE = 100
+ROUNDS = 30
+
+
+@pytest.fixture
+async def hundred_users(db_session):
+    for i in range(PAGE_SIZE):
+        db_session.add(User(
+            nickname=f"bench_{i}", email=f"bench_{i}@example.com", first_name="Bench", last_name=f"User{i}",
+            bio="b" * 500, hashed_password="$2b$12$" + "x" * 53, verification_token="t" * 43,
+            role=UserRole.AUTHENTICATED, email_verified=True,
+        ))
+    await db_session.commit()
+    db_session.expunge_all()
+
+
+async def serve_page(session, projected: bool, serialize: bool = True):
+    page = await UserService.search_users(session, limit=PAGE_SIZE, projected=projected)
+    items = [UserResponse.model_validate(user._mapping if projected else user) for user in page.users] if serialize else page.users
+    # Each request gets a fresh session in production, so don't let the identity map carry over.
+    session.expunge_all()
+    return items
+
+
+async def cpu_ms_per_page(session, projected: bool, serialize: bool) -> float:
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        await serve_page(session, projected, serialize)
+    return (time.process_time() - started) * 1000 / ROUNDS
+
+
+async def measure(session, projected: bool):
+    await serve_page(session, projected)  # warm statement caches
+    tracemalloc.start()
+    items = await serve_page(session, projected)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    fetch_cpu = await cpu_ms_per_page(session, projected, serialize=False)
+    page_cpu = await cpu_ms_per_page(session, projected, serialize=True)
+    return len(items), peak, fetch_cpu, page_cpu
+
+
+async def test_projected_page_is_lighter_than_orm_entities(db_session, hundred_users):
+    orm_items, orm_peak, orm_fetch, orm_page = await measure(db_session, projected=False)
+    view_items, view_peak, view_fetch, view_page = await measure(db_session, projected=True)
+    # "fetch" is query plus materialization; "page" adds UserResponse validation, whose EmailStr
+    # check costs the same on either path.
+    print(f"\n{'read path':<12}{'peak KiB':>10}{'fetch CPU ms':>14}{'page CPU ms':>13}")
+    print(f"{'ORM':<12}{orm_peak / 1024:>10.1f}{orm_fetch:>14.2f}{orm_page:>13.2f}")
+    print(f"{'projected':<12}{view_peak / 1024:>10.1f}{view_fetch:>14.2f}{view_page:>13.2f}")
+    assert orm_items == view_items == PAGE_SIZE
+    assert view_peak < orm_peak
@@ -0,0 +1,67 @@
+"""
+Benchmark: point lookups by email through the ORM (UserService.get_by_email) versus the repository's
+prebuilt statements returning plain rows, with a raw asyncpg prepared statement as the floor, and
+the cached lookup (UserService.get_user_view_by_email) once its entries are warm.
+
+Run with ``pytest tests/benchmarks -s`` to print the comparison.
+"""
+import time
+
+import pytest
+
+from app.models.user_model import User, UserRole
+from app.repositories.user_repository import UserRepository
+from app.services.user_service import UserService
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.slow]
+
+USERS = 200
+ROUNDS = 5
+
+
+@pytest.fixture
+async def lookup_users(db_session):
+    for i in range(USERS):
+        db_session.add(User(
+            nickname=f"lookup_{i}", email=f"lookup_{i}@example.com", first_name="Lookup", bio="b" * 200,
+            hashed_password="$2b$12$" + "x" * 53, role=UserRole.AUTHENTICATED, email_verified=True,
+        ))
+    await db_session.commit()
+    db_session.expunge_all()
+    return [f"lookup_{i}@example.com" for i in range(USERS)]
+
+
+async def per_lookup_us(lookup, emails, session=None) -> tuple:
+    for email in emails[:10]:
+        await lookup(email)  # warm caches
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(ROUNDS):
+        for email in emails:
+            assert await lookup(email) is not None
+        if session is not None:
+            # Each request gets a fresh session in production, so don't let the identity map carry over.
+            session.expunge_all()
+    count = ROUNDS * len(emails)
+    return (time.perf_counter() - wall) * 1e6 / count, (time.process_time() - cpu) * 1e6 / count
+
+
+async def test_repository_lookups_beat_the_orm_path(db_session, lookup_users):
+    orm = await per_lookup_us(lambda email: UserService.get_by_email(db_session, email), lookup_users, db_session)
+    repository = await per_lookup_us(lambda email: UserRepository.get_by_email(db_session, email), lookup_users)
+
+    connection = await (await db_session.connection()).get_raw_connection()
+    statement = await connection.driver_connection.prepare(
+        "SELECT id, nickname, email, first_name, last_name, bio, profile_picture_url, linkedin_profile_url, "
+        "github_profile_url, role, is_professional, last_login_at, created_at, updated_at, version FROM users WHERE email = $1"
+    )
+    raw = await per_lookup_us(statement.fetchrow, lookup_users)
+
+    for email in lookup_users:
+        await UserService.get_user_view_by_email(db_session, email)
+    cached = await per_lookup_us(lambda email: UserService.get_user_view_by_email(db_session, email), lookup_users)
+
+    print(f"\n{'lookup path':<14}{'wall us':>10}{'CPU us':>10}")
+    for name, (wall, cpu) in (("ORM", orm), ("repository", repository), ("raw asyncpg", raw), ("cached", cached)):
+        print(f"{name:<14}{wall:>10.1f}{cpu:>10.1f}")
+    assert repository[1] < orm[1]
+    assert cached[0] < raw[0]
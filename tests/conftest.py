@@ -29,13 +29,16 @@ from faker import Faker
 
 # Application-specific imports
 from app.main import app
-from app.database import Base, Database
+from app.database import Base, Database, snapshot_session_factory
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_read_db, get_settings, get_snapshot_session_factory
+from app.utils.rate_limiter import get_rate_limiter
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
 from app.services.jwt_service import create_access_token
+from app.services.token_revocation_service import token_revocation_registry
+from app.services.user_service import UserService, search_count_cache, user_cache
 
 fake = Faker()
 
@@ -59,6 +62,8 @@ def email_service():
 async def async_client(db_session):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_read_db] = lambda: db_session
+        app.dependency_overrides[get_snapshot_session_factory] = lambda: snapshot_session_factory(engine)
         try:
             yield client
         finally:
@@ -82,6 +87,16 @@ async def setup_database():
          await conn.run_sync(Base.metadata.drop_all)
     await engine.dispose()
 
+# In-process limits and caches are module-level, so reset them to keep tests independent of each other.
+@pytest.fixture(scope="function", autouse=True)
+async def reset_in_process_state():
+    await get_rate_limiter().reset()
+    token_revocation_registry.clear()
+    search_count_cache.clear()
+    user_cache.clear()
+    UserService._users_exist = False
+    yield
+
 @pytest.fixture(scope="function")
 async def db_session(setup_database):
     async with AsyncSessionScoped() as session:
@@ -165,10 +180,10 @@ async def users_with_same_role_50_users(db_session):
     users = []
     for _ in range(50):
         user_data = {
-            "nickname": fake.user_name(),
+            "nickname": fake.unique.user_name(),
             "first_name": fake.first_name(),
             "last_name": fake.last_name(),
-            "email": fake.email(),
+            "email": fake.unique.email(),
             "hashed_password": fake.password(),
             "role": UserRole.AUTHENTICATED,
             "email_verified": False,
@@ -54,6 +54,34 @@ async def test_update_user_not_found(async_client, admin_token):
     response = await async_client.put(f"/users/{uuid4()}", json=payload, headers={"Authorization": f"Bearer {admin_token}"})
     assert response.status_code == 404
 
+@pytest.mark.asyncio
+async def test_update_user_email_in_use(async_client, admin_token, admin_user, user):
+    payload = {"email": admin_user.email}
+    response = await async_client.put(f"/users/{user.id}", json=payload, headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email is already in use."
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(async_client, admin_token, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = (await async_client.get(f"/users/{user.id}", headers=headers)).headers["ETag"]
+    assert etag == '"1"'
+
+    response = await async_client.put(f"/users/{user.id}", json={"first_name": "First"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    # A second writer still holding the old ETag is refused instead of overwriting the first.
+    response = await async_client.put(f"/users/{user.id}", json={"first_name": "Second"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    assert (await async_client.get(f"/users/{user.id}", headers=headers)).json()["first_name"] == "First"
+
+@pytest.mark.asyncio
+async def test_update_user_if_match_missing_user(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}", "If-Match": "*"}
+    response = await async_client.put(f"/users/{uuid4()}", json={"first_name": "Nobody"}, headers=headers)
+    assert response.status_code == 412
+
 @pytest.mark.asyncio
 async def test_delete_user_success(async_client, admin_token, user):
     response = await async_client.delete(f"/users/{user.id}", headers={"Authorization": f"Bearer {admin_token}"})
@@ -53,14 +53,23 @@ async def test_update_user_email_access_allowed(async_client, admin_user, admin_
 
 
 @pytest.mark.asyncio
-async def test_delete_user(async_client, admin_user, admin_token):
+async def test_delete_user(async_client, verified_user, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
-    delete_response = await async_client.delete(f"/users/{admin_user.id}", headers=headers)
+    delete_response = await async_client.delete(f"/users/{verified_user.id}", headers=headers)
     assert delete_response.status_code == 204
     # Verify the user is deleted
-    fetch_response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    fetch_response = await async_client.get(f"/users/{verified_user.id}", headers=headers)
     assert fetch_response.status_code == 404
 
+@pytest.mark.asyncio
+async def test_deleted_user_token_is_revoked(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    delete_response = await async_client.delete(f"/users/{admin_user.id}", headers=headers)
+    assert delete_response.status_code == 204
+    # The deleted admin's own token no longer authenticates
+    fetch_response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    assert fetch_response.status_code == 401
+
 @pytest.mark.asyncio
 async def test_create_user_duplicate_email(async_client, verified_user):
     user_data = {
@@ -105,6 +114,26 @@ async def test_login_success(async_client, verified_user):
     assert decoded_token is not None, "Failed to decode token"
     assert decoded_token["role"] == "AUTHENTICATED", "The user role should be AUTHENTICATED"
 
+@pytest.mark.asyncio
+async def test_refresh_token_flow(async_client, verified_user):
+    form_data = {
+        "username": verified_user.email,
+        "password": "MySuperPassword$1234"
+    }
+    response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+    assert response.status_code == 200
+    refresh_token = response.json()["refresh_token"]
+
+    refresh_response = await async_client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert refresh_response.status_code == 200
+    data = refresh_response.json()
+    assert decode_token(data["access_token"])["sub"] == verified_user.email
+    assert data["refresh_token"] != refresh_token
+
+    # The first refresh token has been rotated and cannot be used again
+    reuse_response = await async_client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert reuse_response.status_code == 401
+
 @pytest.mark.asyncio
 async def test_login_user_not_found(async_client):
     form_data = {
@@ -194,3 +223,197 @@ async def test_list_users_unauthorized(async_client, user_token):
         headers={"Authorization": f"Bearer {user_token}"}
     )
     assert response.status_code == 403  # Forbidden, as expected for regular user
+
+@pytest.mark.asyncio
+async def test_db_pool_stats_admin_only(async_client, admin_token, user_token):
+    response = await async_client.get("/system/db-pool", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+    response = await async_client.get("/system/db-pool", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert "checked_out" in response.json()
+    assert "wait_time_ms" in response.json()
+
+@pytest.mark.asyncio
+async def test_user_cache_stats_admin_only(async_client, admin_user, admin_token, user_token):
+    response = await async_client.get("/system/user-cache", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for _ in range(2):
+        assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 200
+    stats = (await async_client.get("/system/user-cache", headers=headers)).json()
+    assert (stats["size"], stats["misses"], stats["hits"]) == (1, 1, 1)
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.database import read_only_session_factory
+from app.dependencies import get_read_db
+from app.services.user_service import user_cache
+from tests.conftest import engine as test_engine
+
+async def _count_round_trips(async_client, path, headers, session_factory):
+    """Counts the statements the server sees for one request: SQL plus BEGIN/COMMIT/ROLLBACK."""
+    statements = []
+
+    def log_query(record):
+        statements.append(record.query)
+
+    def on_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.driver_connection.add_query_logger(log_query)
+
+    def on_checkin(dbapi_connection, connection_record):
+        connection_record.driver_connection.remove_query_logger(log_query)
+
+    async def override():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = override
+    event.listen(test_engine.sync_engine, "before_cursor_execute", on_cursor_execute)
+    event.listen(test_engine.sync_engine, "checkout", on_checkout)
+    event.listen(test_engine.sync_engine, "checkin", on_checkin)
+    try:
+        response = await async_client.get(path, headers=headers)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", on_cursor_execute)
+        event.remove(test_engine.sync_engine, "checkout", on_checkout)
+        event.remove(test_engine.sync_engine, "checkin", on_checkin)
+    assert response.status_code == 200
+    return statements
+
+@pytest.mark.asyncio
+async def test_get_user_is_one_round_trip(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    path = f"/users/{admin_user.id}"
+    transactional = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+    statements = await _count_round_trips(async_client, path, headers, transactional)
+    assert len(statements) == 3  # BEGIN, SELECT, ROLLBACK
+
+    user_cache.clear()  # measure the database read, not the cached row
+    statements = await _count_round_trips(async_client, path, headers, read_only_session_factory(test_engine))
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("SELECT")
+
+@pytest.mark.asyncio
+async def test_list_users_cursor_pagination(async_client, db_session, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/?pagination=cursor&limit=20&sort_by=email&order=asc", headers=headers)
+    assert response.status_code == 200
+    seen = []
+    while True:
+        body = response.json()
+        assert body["page"] is None
+        seen.extend(item["email"] for item in body["items"])
+        next_links = [link["href"] for link in body["links"] if link["rel"] == "next"]
+        if not next_links:
+            assert body["next_cursor"] is None
+            break
+        response = await async_client.get(next_links[0], headers=headers)
+        assert response.status_code == 200
+    expected = (await db_session.execute(select(User.email).order_by(User.email, User.id))).scalars().all()
+    assert seen == expected
+    assert len(seen) == body["total"]
+
+@pytest.mark.asyncio
+async def test_list_users_without_count(async_client, admin_token, users_with_same_role_50_users):
+    response = await async_client.get("/users/?count=none&limit=10", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] is None
+    assert body["total_mode"] == "none"
+    rels = {link["rel"] for link in body["links"]}
+    assert "next" in rels and "last" not in rels
+
+@pytest.mark.asyncio
+async def test_list_users_full_text_search(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get(f"/users/?q={admin_user.nickname}&highlight=true", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [str(admin_user.id)]
+    assert "<mark>" in body["highlights"][str(admin_user.id)]
+
+@pytest.mark.asyncio
+async def test_import_users_ndjson(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "application/x-ndjson"}
+    body = (
+        '{"email": "bulk1@example.com", "password": "Secure*1234"}\n'
+        '{"email": "bulk2@example.com", "password": "Secure*1234"}\n'
+        '{"email": "not-an-email", "password": "Secure*1234"}\n'
+    )
+    response = await async_client.post("/users/import", content=body, headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["row"] == 3
+
+@pytest.mark.asyncio
+async def test_import_users_rejects_unknown_content_type(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "application/json"}
+    response = await async_client.post("/users/import", content="[]", headers=headers)
+    assert response.status_code == 415
+
+@pytest.mark.asyncio
+async def test_import_users_access_denied(async_client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}", "Content-Type": "application/x-ndjson"}
+    response = await async_client.post("/users/import", content="", headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_bulk_lock_users_by_filter(async_client, admin_user, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    body = {"action": "lock", "filters": {}, "dry_run": True}
+    response = await async_client.post("/users/bulk", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["matched"] == 50  # the calling admin is excluded
+
+    body["dry_run"] = False
+    response = await async_client.post("/users/bulk", json=body, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["updated"] == 50
+
+@pytest.mark.asyncio
+async def test_bulk_update_access_denied(async_client, user_token):
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = await async_client.post("/users/bulk", json={"action": "unlock", "filters": {}}, headers=headers)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_export_users_streams_ndjson(async_client, admin_user, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/export", params={"role": "AUTHENTICATED"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert len(response.text.splitlines()) == 50
+
+    response = await async_client.get("/users/export", params={"format": "csv", "role": "ADMIN"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines()[1].startswith(str(admin_user.id))
+
+@pytest.mark.asyncio
+async def test_export_users_access_denied(async_client, user_token):
+    response = await async_client.get("/users/export", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_login_and_refresh_commit_once(async_client, verified_user):
+    commits = []
+    listener = lambda conn: commits.append(conn)
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    event.listen(test_engine.sync_engine, "commit", listener)
+    try:
+        response = await async_client.post("/login/", data=urlencode(form_data), headers={"Content-Type": "application/x-www-form-urlencoded"})
+        assert response.status_code == 200
+        assert len(commits) == 1  # the login counters and the refresh token together
+
+        refresh = await async_client.post("/token/refresh", json={"refresh_token": response.json()["refresh_token"]})
+        assert refresh.status_code == 200
+        assert len(commits) == 2
+    finally:
+        event.remove(test_engine.sync_engine, "commit", listener)
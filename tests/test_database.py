@@ -0,0 +1,152 @@
+import asyncio
+import time
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import asyncpg
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import State
+from starlette.requests import Request
+
+from app.database import (
+    READ_YOUR_WRITES_COOKIE, Database, InstrumentedAsyncQueuePool, PoolWaitHistogram, WriteTrackingSession, _asyncpg_connect_args
+)
+from app.dependencies import _reads_pinned_to_primary, get_db, get_settings
+from app.main import app
+from app.models.user_model import User
+
+settings = get_settings()
+
+def test_wait_histogram_buckets():
+    histogram = PoolWaitHistogram()
+    histogram.observe(0.2)
+    histogram.observe(7)
+    histogram.observe(60000)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 3
+    assert snapshot["buckets"]["le_1"] == 1
+    assert snapshot["buckets"]["le_10"] == 1
+    assert snapshot["buckets"]["le_inf"] == 1
+
+def test_pgbouncer_mode_disables_prepared_statement_caches():
+    connect_args = _asyncpg_connect_args(statement_cache_size=100, pgbouncer_transaction_mode=True)
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+def test_statement_cache_size_is_passed_through():
+    assert _asyncpg_connect_args(250, False) == {"prepared_statement_cache_size": 250}
+
+def test_pool_stats_reports_configuration():
+    stats = Database.pool_stats()
+    assert stats["size"] == 5
+    assert stats["max_overflow"] == 10
+    assert set(stats["wait_time_ms"]) == {"buckets", "count", "sum_ms", "timeouts"}
+
+async def test_instrumented_pool_records_waits_and_timeouts():
+    engine = create_async_engine(
+        settings.database_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+        connect_args=_asyncpg_connect_args(100, True),
+    )
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+        histogram = engine.sync_engine.pool.wait_histogram.snapshot()
+        assert histogram["count"] == 1
+        assert histogram["timeouts"] == 1
+    finally:
+        await engine.dispose()
+
+async def test_instrumented_pool_leaves_connect_time_out_of_waits():
+    dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def slow_connect():
+        await asyncio.sleep(0.3)
+        return await asyncpg.connect(dsn)
+
+    engine = create_async_engine(
+        settings.database_url, async_creator=slow_connect, poolclass=InstrumentedAsyncQueuePool, pool_size=1, max_overflow=1
+    )
+    try:
+        async with engine.connect() as first, engine.connect() as overflow:
+            assert (await overflow.execute(text("SELECT 1"))).scalar() == 1
+        histogram = engine.sync_engine.pool.wait_histogram.snapshot()
+        assert histogram["count"] == 2
+        assert histogram["sum_ms"] < 100
+    finally:
+        await engine.dispose()
+
+def test_read_sessions_use_primary_without_replicas():
+    factory = Database.get_read_session_factory("sub:someone")
+    assert factory is Database._primary_read_session_factory
+    assert factory.kw["bind"].url == Database._engine.url
+
+def test_read_sessions_round_robin_and_read_your_writes(monkeypatch):
+    replicas = [object(), object()]
+    monkeypatch.setattr(Database, "_read_session_factories", replicas)
+    monkeypatch.setattr(Database, "_recent_writes", {})
+    assert [Database.get_read_session_factory("sub:a") for _ in range(4)].count(replicas[0]) == 2
+
+    Database.mark_write("sub:a")
+    assert Database.get_read_session_factory("sub:a") is Database._primary_read_session_factory
+    assert Database.get_read_session_factory("sub:b") in replicas
+
+    # A client pinned by its cookie reads from the primary whichever worker it reaches.
+    assert Database.get_read_session_factory("sub:b", pinned=True) is Database._primary_read_session_factory
+
+    monkeypatch.setattr(Database, "_read_your_writes_seconds", 0)
+    Database.mark_write("sub:a")
+    assert Database.get_read_session_factory("sub:a") in replicas
+
+async def test_committed_writes_are_marked(monkeypatch):
+    monkeypatch.setattr(Database, "_recent_writes", {})
+    engine = create_async_engine(settings.database_url)
+    factory = sessionmaker(bind=engine, class_=AsyncSession, sync_session_class=WriteTrackingSession, expire_on_commit=False)
+    try:
+        async with factory() as session:
+            session.info["read_your_writes_key"] = "sub:reader"
+            session.info["request_state"] = request_state = State()
+            await session.execute(select(User.id).limit(1))
+            await session.commit()
+            assert not Database.wrote_recently("sub:reader")
+            assert not hasattr(request_state, "primary_reads_until")
+
+            session.info["read_your_writes_key"] = "sub:writer"
+            await session.execute(update(User).where(User.id == uuid4()).values(first_name="x"))
+            await session.commit()
+            assert Database.wrote_recently("sub:writer")
+            assert request_state.primary_reads_until > time.time()
+    finally:
+        await engine.dispose()
+
+async def test_write_responses_pin_the_clients_reads_on_every_worker(async_client, verified_user):
+    # Use the real get_db so commits reach the response; its pool may hold another test's connections.
+    app.dependency_overrides.pop(get_db)
+    await Database._engine.dispose()
+    form_data = urlencode({"username": verified_user.email, "password": "MySuperPassword$1234"})
+    try:
+        response = await async_client.post("/login/", data=form_data, headers={"Content-Type": "application/x-www-form-urlencoded"})
+    finally:
+        await Database._engine.dispose()
+    assert response.status_code == 200
+    until = float(response.cookies[READ_YOUR_WRITES_COOKIE])
+    assert until > time.time()
+
+    cookie = f"{READ_YOUR_WRITES_COOKIE}={until}"
+    assert _reads_pinned_to_primary(Request({"type": "http", "headers": [(b"cookie", cookie.encode())]}))
+    expired = f"{READ_YOUR_WRITES_COOKIE}={time.time() - 1}"
+    assert not _reads_pinned_to_primary(Request({"type": "http", "headers": [(b"cookie", expired.encode())]}))
+    assert not _reads_pinned_to_primary(Request({"type": "http", "headers": []}))
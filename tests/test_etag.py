@@ -0,0 +1,14 @@
+from app.utils.etag import format_etag, parse_if_match
+
+
+def test_etag_round_trips_through_if_match():
+    assert parse_if_match(format_etag(7)) == [7]
+
+
+def test_if_match_lists_and_wildcard():
+    assert parse_if_match('"3", "4"') == [3, 4]
+    assert parse_if_match(" * ") is None
+
+
+def test_if_match_ignores_weak_and_foreign_tags():
+    assert parse_if_match('W/"3", "abc", ""') == []
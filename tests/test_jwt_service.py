@@ -0,0 +1,50 @@
+from builtins import range, str
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+import time
+import jwt
+import pytest
+from app.dependencies import get_current_user
+from app.services.jwt_service import TokenClaimsCache, create_access_token, decode_token, decode_token_cached, token_claims_cache
+
+def test_decode_token_cached_decodes_once():
+    token = create_access_token(data={"sub": "cached@example.com", "role": "admin"})
+    token_claims_cache.clear()
+    with patch("app.services.jwt_service.jwt.decode", wraps=jwt.decode) as jwt_decode:
+        first = decode_token_cached(token)
+        second = decode_token_cached(token)
+    assert first == second == decode_token(token)
+    assert jwt_decode.call_count == 1
+
+def test_decode_token_cached_rejects_invalid_token():
+    assert decode_token_cached("not-a-jwt") is None
+
+def test_token_claims_cache_evicts_at_expiry():
+    cache = TokenClaimsCache(max_size=10)
+    cache.put("expired-token", {"sub": "user", "exp": time.time() - 1})
+    cache.put("live-token", {"sub": "user", "exp": time.time() + 60})
+    assert cache.get("expired-token") is None
+    assert cache.get("live-token") == {"sub": "user", "exp": pytest.approx(time.time() + 60, abs=5)}
+    assert len(cache) == 1
+
+def test_token_claims_cache_is_bounded_lru():
+    cache = TokenClaimsCache(max_size=2)
+    for i in range(3):
+        cache.put(f"token-{i}", {"sub": str(i), "exp": time.time() + 60})
+    assert cache.get("token-0") is None
+    assert cache.get("token-1") is not None
+    cache.put("token-3", {"sub": "3", "exp": time.time() + 60})
+    # token-1 was used more recently than token-2, so token-2 is evicted
+    assert cache.get("token-2") is None
+    assert cache.get("token-1") is not None
+
+def test_get_current_user_stores_claims_on_request_state():
+    token = create_access_token(data={"sub": "state@example.com", "role": "manager"}, expires_delta=timedelta(minutes=5))
+    request = MagicMock()
+    request.state = MagicMock(spec=[])
+    current_user = get_current_user(request, token)
+    assert current_user == {"user_id": "state@example.com", "role": "MANAGER"}
+    assert request.state.current_user is current_user
+    with patch("app.dependencies.decode_token_cached") as decode:
+        assert get_current_user(request, token) is current_user
+    decode.assert_not_called()
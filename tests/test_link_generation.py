@@ -6,7 +6,7 @@ from uuid import uuid4
 import pytest
 from fastapi import Request
 
-from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links
+from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_cursor_links, generate_pagination_links
 
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 
@@ -49,3 +49,18 @@ def test_generate_pagination_links(mock_request):
     assert len(links) >= 4
     expected_self_url = "http://testserver/users?limit=5&skip=10"
     assert normalize_url(str(links[0].href)) == normalize_url(expected_self_url), "Self link should match expected URL"
+
+def test_pagination_links_keep_filters():
+    request = MagicMock(spec=Request)
+    request.url = "http://testserver/users?role=ADMIN&skip=10&limit=5"
+    links = generate_pagination_links(request, 10, 5, 50)
+    next_link = next(link for link in links if link.rel == "next")
+    assert normalize_url(str(next_link.href)) == normalize_url("http://testserver/users?role=ADMIN&skip=15&limit=5")
+
+def test_generate_cursor_links():
+    request = MagicMock(spec=Request)
+    request.url = "http://testserver/users?role=ADMIN&pagination=cursor&limit=5"
+    links = {link.rel: str(link.href) for link in generate_cursor_links(request, 5, "abc", None)}
+    assert set(links) == {"self", "first", "next"}
+    assert normalize_url(links["next"]) == normalize_url("http://testserver/users?role=ADMIN&pagination=cursor&limit=5&cursor=abc")
+    assert "cursor=" not in links["first"]
@@ -0,0 +1,22 @@
+import re
+from app.utils.nickname_gen import ADJECTIVES, ANIMALS, generate_nickname, generate_nicknames, nickname_namespace_size
+
+
+def test_generated_nickname_format():
+    for _ in range(100):
+        adjective, animal, number = generate_nickname(digits=2).split("_")
+        assert adjective in ADJECTIVES and animal in ANIMALS
+        assert 0 <= int(number) < 100
+        assert re.match(r"^[\w-]+$", f"{adjective}_{animal}_{number}")
+
+
+def test_namespace_grows_with_digits():
+    assert nickname_namespace_size(0) == len(ADJECTIVES) * len(ANIMALS)
+    assert nickname_namespace_size(4) == nickname_namespace_size(0) * 10_000
+    assert nickname_namespace_size() >= 10_000_000
+
+
+def test_generate_nicknames_are_distinct_and_capped_by_namespace():
+    batch = generate_nicknames(50)
+    assert len(batch) == len(set(batch)) == 50
+    assert len(generate_nicknames(10_000, digits=0)) == nickname_namespace_size(0)
@@ -0,0 +1,138 @@
+from builtins import range
+from unittest.mock import AsyncMock, patch
+from urllib.parse import urlencode
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.dependencies import get_settings
+from app.models.rate_limit_model import RateLimitCounter
+from app.utils.rate_limiter import InMemoryRateLimitBackend, PostgresRateLimitBackend, RateLimiter, retry_after_header
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_allows_up_to_limit():
+    backend = InMemoryRateLimitBackend()
+    results = [await backend.hit("login:ip:1.2.3.4", 3, 60) for _ in range(4)]
+    assert results[:3] == [0.0, 0.0, 0.0]
+    assert 0 < results[3] <= 60
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_keys_are_independent():
+    backend = InMemoryRateLimitBackend()
+    assert await backend.hit("login:target:a@example.com", 1, 60) == 0.0
+    assert await backend.hit("login:target:b@example.com", 1, 60) == 0.0
+    assert await backend.hit("login:target:a@example.com", 1, 60) > 0
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_is_bounded():
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    for i in range(50):
+        await backend.hit(f"register:ip:10.0.0.{i}", 5, 60)
+    assert len(backend._counters) <= 10
+
+@pytest.mark.asyncio
+async def test_rate_limiter_fails_open_when_backend_errors():
+    backend = AsyncMock()
+    backend.hit.side_effect = ConnectionError("store unavailable")
+    assert await RateLimiter(backend).check([("login:ip:1.2.3.4", 1, 60)]) == 0.0
+
+@pytest.mark.asyncio
+async def test_postgres_backend_shares_counters(setup_database):
+    engine = create_async_engine(get_settings().database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        first, second = PostgresRateLimitBackend(session_factory), PostgresRateLimitBackend(session_factory)
+        assert await first.hit("login:ip:5.6.7.8", 2, 60) == 0.0
+        assert await second.hit("login:ip:5.6.7.8", 2, 60) == 0.0
+        assert await first.hit("login:ip:5.6.7.8", 2, 60) > 0
+        await first.reset()
+        assert await second.hit("login:ip:5.6.7.8", 2, 60) == 0.0
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_postgres_backend_weights_previous_window(setup_database):
+    engine = create_async_engine(get_settings().database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    memory, shared = InMemoryRateLimitBackend(), PostgresRateLimitBackend(session_factory)
+    try:
+        with patch("app.utils.rate_limiter.time.time", return_value=1200.0):
+            for backend in (memory, shared):
+                assert await backend.hit("login:ip:5.6.7.8", 2, 60) == 0.0
+                assert await backend.hit("login:ip:5.6.7.8", 2, 60) == 0.0
+        # 10% into the next window, 90% of the previous window's two hits still count.
+        with patch("app.utils.rate_limiter.time.time", return_value=1266.0):
+            retry_after = await shared.hit("login:ip:5.6.7.8", 2, 60)
+            assert retry_after > 0
+            assert retry_after == pytest.approx(await memory.hit("login:ip:5.6.7.8", 2, 60))
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_postgres_backend_purges_expired_counters(setup_database):
+    engine = create_async_engine(get_settings().database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    backend = PostgresRateLimitBackend(session_factory, purge_interval_seconds=60)
+    try:
+        with patch("app.utils.rate_limiter.time.time", return_value=1200.0):
+            await backend.hit("login:ip:5.6.7.8", 2, 60)
+        with patch("app.utils.rate_limiter.time.time", return_value=1290.0):
+            await backend.hit("login:ip:5.6.7.9", 2, 60)
+        with patch("app.utils.rate_limiter.time.time", return_value=1350.0):
+            await backend.hit("login:ip:5.6.7.10", 2, 60)
+        async with session_factory() as session:
+            keys = set((await session.execute(select(RateLimitCounter.key))).scalars())
+        # The first key's window ended more than a window ago; the second still weighs on the third window.
+        assert keys == {"login:ip:5.6.7.9", "login:ip:5.6.7.10"}
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_login_target_limit_holds_for_overlong_usernames(async_client, setup_database):
+    engine = create_async_engine(get_settings().database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    limit = get_settings().rate_limit_login_per_target
+    form_data = urlencode({"username": "x" * 1000 + "@example.com", "password": "WrongPassword!1"})
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    try:
+        with patch("app.dependencies.get_rate_limiter", return_value=RateLimiter(PostgresRateLimitBackend(session_factory))), \
+                patch("app.services.user_service.UserService.login_user", new_callable=AsyncMock, return_value=None):
+            statuses = [(await async_client.post("/login/", data=form_data, headers=headers)).status_code for _ in range(limit + 1)]
+        assert statuses == [401] * limit + [429]
+    finally:
+        await engine.dispose()
+
+def test_retry_after_header_rounds_up():
+    assert retry_after_header(0.2) == "1"
+    assert retry_after_header(12.1) == "13"
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_before_any_login_work(async_client, verified_user):
+    limit = get_settings().rate_limit_login_per_target
+    form_data = urlencode({"username": verified_user.email, "password": "WrongPassword!1"})
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    for _ in range(limit):
+        await async_client.post("/login/", data=form_data, headers=headers)
+
+    with patch("app.services.user_service.UserService.login_user", new_callable=AsyncMock) as login_user:
+        response = await async_client.post("/login/", data=form_data, headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    login_user.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_login_ip_limit_uses_forwarded_client_address(async_client, monkeypatch):
+    # The test client connects from 127.0.0.1, the default trusted proxy address.
+    monkeypatch.setenv("RATE_LIMIT_LOGIN_PER_IP", "2")
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    async def login(username, client_ip):
+        form_data = urlencode({"username": username, "password": "WrongPassword!1"})
+        return await async_client.post("/login/", data=form_data, headers={**headers, "X-Forwarded-For": client_ip})
+
+    with patch("app.services.user_service.UserService.login_user", new_callable=AsyncMock, return_value=None):
+        assert (await login("a@example.com", "203.0.113.7")).status_code == 401
+        assert (await login("b@example.com", "203.0.113.7")).status_code == 401
+        assert (await login("c@example.com", "203.0.113.7")).status_code == 429
+        # Another client behind the same proxy has its own budget.
+        assert (await login("d@example.com", "198.51.100.4")).status_code == 401
@@ -0,0 +1,24 @@
+import pytest
+from uuid import uuid4
+from app.models.user_model import User, UserRole
+from app.repositories.user_repository import USER_VIEW_COLUMNS, UserRepository
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_lookups_return_plain_rows(db_session, user):
+    for row in (
+        await UserRepository.get_by_id(db_session, user.id),
+        await UserRepository.get_by_email(db_session, user.email),
+        await UserRepository.get_by_nickname(db_session, user.nickname),
+    ):
+        assert not isinstance(row, User)
+        assert row.id == user.id
+        assert row.role is UserRole.AUTHENTICATED
+        assert list(row._mapping) == [column.key for column in USER_VIEW_COLUMNS]
+
+
+async def test_lookups_miss(db_session, user):
+    assert await UserRepository.get_by_id(db_session, uuid4()) is None
+    assert await UserRepository.get_by_email(db_session, "ghost@example.com") is None
+    assert await UserRepository.get_by_nickname(db_session, "ghost") is None
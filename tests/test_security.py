@@ -1,7 +1,12 @@
 # test_security.py
 from builtins import RuntimeError, ValueError, isinstance, str
+import asyncio
+import time
 import pytest
-from app.utils.security import hash_password, verify_password
+from app.utils.security import (
+    PasswordHashPool, PasswordHashPoolBusy, bcrypt_rounds_of, calibrate_bcrypt_rounds, hash_password, hash_password_async,
+    password_needs_rehash, verify_password, verify_password_async
+)
 
 def test_hash_password():
     """Test that hashing password returns a bcrypt hashed string."""
@@ -65,3 +70,68 @@ def test_hash_password_internal_error(monkeypatch):
     with pytest.raises(ValueError):
         hash_password("test")
 
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_password_async():
+    """Test that the async variants hash and verify through the worker pool."""
+    hashed = await hash_password_async("secure_password", 4)
+    assert hashed.startswith('$2b$04$')
+    assert await verify_password_async("secure_password", hashed) is True
+    assert await verify_password_async("wrong_password", hashed) is False
+
+@pytest.mark.asyncio
+async def test_verify_password_async_invalid_hash():
+    """Test that errors raised inside the worker propagate to the caller."""
+    with pytest.raises(ValueError):
+        await verify_password_async("secure_password", "invalid_hash_format")
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_rejects_when_queue_full():
+    """Test that calls beyond the pool size plus queue depth are rejected immediately."""
+    pool = PasswordHashPool(size=1, max_queue=0, timeout=5)
+    try:
+        first = asyncio.ensure_future(pool.run(hash_password, "secure_password", 4))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHashPoolBusy):
+            await pool.run(hash_password, "secure_password", 4)
+        assert (await first).startswith('$2b$04$')
+        assert pool.in_flight == 0
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_keeps_slot_until_timed_out_job_ends():
+    """Test that a timed-out call holds its slot while the worker is still busy with it."""
+    pool = PasswordHashPool(size=1, max_queue=0, timeout=30)
+    try:
+        await pool.run(time.sleep, 0)  # start the worker process
+        pool.timeout = 0.2
+        with pytest.raises(PasswordHashPoolBusy, match="timed out"):
+            await pool.run(time.sleep, 1)
+        assert pool.in_flight == 1
+        with pytest.raises(PasswordHashPoolBusy, match="full"):
+            await pool.run(time.sleep, 0)
+        for _ in range(100):
+            if pool.in_flight == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.in_flight == 0
+    finally:
+        pool.shutdown()
+
+def test_bcrypt_rounds_of():
+    """Test reading the cost factor back out of a bcrypt hash."""
+    assert bcrypt_rounds_of(hash_password("secure_password", 5)) == 5
+    assert bcrypt_rounds_of("invalid_hash_format") is None
+
+def test_password_needs_rehash(monkeypatch):
+    """Test that hashes created with a different cost factor are flagged for rehashing."""
+    monkeypatch.setattr("app.utils.security._bcrypt_rounds", 5)
+    assert password_needs_rehash(hash_password("secure_password", 4)) is True
+    assert password_needs_rehash(hash_password("secure_password")) is False
+
+def test_calibrate_bcrypt_rounds_stays_within_bounds():
+    """Test that calibration never leaves the configured cost factor range."""
+    assert calibrate_bcrypt_rounds(0, 4, 6) == 4
+    assert calibrate_bcrypt_rounds(60_000, 4, 6) == 6
+    assert 4 <= calibrate_bcrypt_rounds(50, 4, 8) <= 8
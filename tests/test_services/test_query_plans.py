@@ -0,0 +1,138 @@
+"""
+Query-plan regression tests for UserService.search_users.
+
+Each documented filter/sort combination is run through search_users against a seeded table and the
+statement it sends is EXPLAINed, so dropping or breaking an index fails here rather than in production.
+
+    filter / sort                                 index
+    --------------------------------------------  --------------------------------
+    (none), created_at desc                       ix_users_created_at_id
+    role, created_at desc                         ix_users_role_created_at
+    role + registered_from, created_at desc       ix_users_role_created_at
+    is_locked=true, created_at desc               ix_users_locked_created_at (partial)
+    is_professional=true, created_at desc         ix_users_professional_created_at (partial)
+    registered_from..registered_to                ix_users_created_at_id
+    sort_by=email / nickname                      ix_users_email / ix_users_nickname
+    sort_by=last_name, cursor mode                ix_users_last_name_id
+    q (full text)                                 ix_users_search_vector
+    email/nickname/first/last_name substring      ix_users_<column>_trgm (needs pg_trgm)
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.models.user_model import User, UserRole
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+TRIGRAM_COLUMNS = ("email", "nickname", "first_name", "last_name")
+
+
+async def explain(session, query) -> str:
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = (await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar()
+    return json.dumps(plan if not isinstance(plan, str) else json.loads(plan))
+
+
+@pytest.fixture
+async def trigram_indexed_users(db_session):
+    available = (await db_session.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )).scalar()
+    if not available:
+        pytest.skip("pg_trgm is not available on this PostgreSQL server")
+    await db_session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in TRIGRAM_COLUMNS:
+        await db_session.execute(text(f"CREATE INDEX ix_users_{column}_trgm ON users USING gin ({column} gin_trgm_ops)"))
+    await db_session.execute(text("""
+        INSERT INTO users (id, nickname, email, first_name, last_name, role, email_verified, hashed_password, token_version)
+        SELECT gen_random_uuid(), 'nick_' || g, 'user' || g || '@example.com', 'first' || g, 'last' || g,
+               'AUTHENTICATED', true, 'x', 0
+        FROM generate_series(1, 20000) AS g
+    """))
+    await db_session.commit()
+    await db_session.execute(text("ANALYZE users"))
+
+
+@pytest.mark.parametrize("column", TRIGRAM_COLUMNS)
+async def test_substring_search_uses_trigram_index(db_session, trigram_indexed_users, column):
+    filters = UserService._build_search_filters(**{column: "12345"})
+    plan = await explain(db_session, select(User.id).where(*filters))
+    assert f"ix_users_{column}_trgm" in plan
+    assert "Seq Scan" not in plan
+
+
+SEEDED_ROWS = 100_000
+
+
+@pytest.fixture
+async def seeded_users(db_session):
+    # Roughly production-shaped: mostly authenticated users, few admins/managers, ~1% locked,
+    # ~10% professionals, sign-ups spread over three years, a handful of bios mentioning python.
+    await db_session.execute(text(f"""
+        INSERT INTO users (id, nickname, email, first_name, last_name, bio, role, is_locked, is_professional,
+                           email_verified, hashed_password, token_version, created_at, updated_at)
+        SELECT gen_random_uuid(), 'nick_' || g, 'user' || g || '@example.com', 'first' || (g % 5000),
+               'last' || (g % 7000), CASE WHEN g % 100 = 0 THEN 'writes python daily' ELSE 'hello there' END,
+               (CASE WHEN g % 100 = 0 THEN 'ADMIN' WHEN g % 25 = 0 THEN 'MANAGER'
+                     WHEN g % 20 = 0 THEN 'ANONYMOUS' ELSE 'AUTHENTICATED' END)::"UserRole",
+               g % 97 = 0, g % 10 = 0, true, 'x', 0,
+               now() - (g % 1095) * interval '1 day' - (g % 86400) * interval '1 second', now()
+        FROM generate_series(1, {SEEDED_ROWS}) AS g
+    """))
+    await db_session.commit()
+    await db_session.execute(text("ANALYZE users"))
+
+
+async def page_query_plan(session, **search) -> str:
+    """EXPLAINs the page query search_users actually sends, with the same parameters."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        await UserService.search_users(session, limit=10, count_mode="none", **search)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+    statement, parameters = statements[0]
+    connection = await session.connection()
+    plan = (await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)).scalar()
+    return json.dumps(plan if not isinstance(plan, str) else json.loads(plan))
+
+
+RECENT = date.today() - timedelta(days=200)
+
+PLAN_CASES = [
+    ({}, "ix_users_created_at_id"),
+    ({"role": UserRole.MANAGER}, "ix_users_role_created_at"),
+    ({"role": UserRole.ADMIN, "registered_from": RECENT}, "ix_users_role_created_at"),
+    ({"is_locked": True}, "ix_users_locked_created_at"),
+    ({"is_professional": True}, "ix_users_professional_created_at"),
+    ({"registered_from": RECENT, "registered_to": RECENT + timedelta(days=7)}, "ix_users_created_at_id"),
+    ({"sort_by": "email", "order": "asc"}, "ix_users_email"),
+    ({"sort_by": "nickname", "order": "desc"}, "ix_users_nickname"),
+    ({"sort_by": "last_name", "order": "asc", "keyset": True}, "ix_users_last_name_id"),
+    ({"q": "python"}, "ix_users_search_vector"),
+]
+
+
+@pytest.mark.slow
+async def test_search_plans_use_indexes(db_session, seeded_users):
+    # One seeded table for every case: seeding dominates the runtime, so the cases share it and
+    # the failure message lists every combination whose plan regressed.
+    first_keyset_page = await UserService.search_users(db_session, limit=10, count_mode="none", keyset=True)
+    cases = PLAN_CASES + [({"cursor": first_keyset_page.next_cursor}, "ix_users_created_at_id")]
+
+    regressions = []
+    for search, index in cases:
+        plan = await page_query_plan(db_session, **search)
+        if index not in plan or "Seq Scan" in plan:
+            regressions.append(f"{search}: expected {index}, got {plan}")
+    assert not regressions, "\n".join(regressions)
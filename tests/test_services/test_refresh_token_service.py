@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.models.refresh_token_model import RefreshToken
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+# Test that only a digest of an issued token is stored
+async def test_issue_stores_token_digest(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    records = (await db_session.execute(select(RefreshToken))).scalars().all()
+    assert len(records) == 1
+    assert records[0].token_hash == RefreshTokenService._digest(token)
+    assert token.encode() not in records[0].token_hash
+
+# Test rotating a refresh token returns its user and a new token in the same family
+async def test_rotate_issues_new_token_in_same_family(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    user, new_token = await RefreshTokenService.rotate(db_session, token)
+    assert user.id == verified_user.id
+    assert new_token != token
+    families = (await db_session.execute(select(RefreshToken.family_id))).scalars().all()
+    assert len(families) == 2 and len(set(families)) == 1
+
+# Test presenting a rotated token again revokes the whole family
+async def test_rotate_reuse_revokes_family(db_session, verified_user):
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    _, new_token = await RefreshTokenService.rotate(db_session, token)
+    with pytest.raises(HTTPException) as exc_info:
+        await RefreshTokenService.rotate(db_session, token)
+    assert exc_info.value.status_code == 401
+    with pytest.raises(HTTPException):
+        await RefreshTokenService.rotate(db_session, new_token)
+
+# Test unknown and expired tokens are rejected
+async def test_rotate_rejects_unknown_and_expired_tokens(db_session, verified_user):
+    with pytest.raises(HTTPException) as exc_info:
+        await RefreshTokenService.rotate(db_session, "unknown-token")
+    assert exc_info.value.status_code == 401
+
+    token = await RefreshTokenService.issue(db_session, verified_user.id)
+    record = (await db_session.execute(select(RefreshToken))).scalars().one()
+    record.expires_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    await db_session.commit()
+    with pytest.raises(HTTPException) as exc_info:
+        await RefreshTokenService.rotate(db_session, token)
+    assert exc_info.value.status_code == 401
+
+# Test locked accounts cannot renew their session
+async def test_rotate_rejects_locked_user(db_session, locked_user):
+    token = await RefreshTokenService.issue(db_session, locked_user.id)
+    with pytest.raises(HTTPException) as exc_info:
+        await RefreshTokenService.rotate(db_session, token)
+    assert exc_info.value.status_code == 403
+
+# Test a password reset ends every session, including ones that would be renewed by refresh token
+async def test_password_reset_revokes_refresh_tokens(db_session, verified_user):
+    user_id = verified_user.id
+    first = await RefreshTokenService.issue(db_session, user_id)
+    second = await RefreshTokenService.issue(db_session, user_id)
+    assert await UserService.reset_password(db_session, user_id, "NewSecure*1234")
+    for token in (first, second):
+        with pytest.raises(HTTPException) as exc_info:
+            await RefreshTokenService.rotate(db_session, token)
+        assert exc_info.value.status_code == 401
@@ -0,0 +1,140 @@
+from builtins import range
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+import pytest
+from fastapi import HTTPException, Request
+from sqlalchemy import func, select, update
+from app.dependencies import get_current_user, get_settings
+from app.models.user_model import User, UserRole
+from app.services.jwt_service import create_access_token
+from app.services.token_revocation_service import (
+    REVOCATION_CHANNEL, TokenRevocationRegistry, TokenRevocationSync, revocation_notification, token_revocation_registry
+)
+from app.services.user_service import UserService
+from tests.conftest import AsyncTestingSessionLocal, engine
+
+pytestmark = pytest.mark.asyncio
+
+async def test_registry_revokes_older_versions():
+    registry = TokenRevocationRegistry(retention_seconds=60)
+    user_id = uuid4()
+    registry.apply(user_id, 2)
+    assert registry.is_revoked(str(user_id), 1)
+    assert registry.is_revoked(str(user_id), 0)
+    assert not registry.is_revoked(str(user_id), 2)
+    assert not registry.is_revoked(str(uuid4()), 0)
+
+async def test_registry_never_lowers_a_version():
+    registry = TokenRevocationRegistry(retention_seconds=60)
+    user_id = uuid4()
+    registry.apply(user_id, 3)
+    registry.apply(user_id, 1)
+    assert registry.is_revoked(str(user_id), 2)
+
+async def test_registry_prunes_entries_after_token_lifetime():
+    registry = TokenRevocationRegistry(retention_seconds=0)
+    registry.apply(uuid4(), 1)
+    registry.revoke(uuid4())
+    registry.prune()
+    assert len(registry) == 0
+
+async def test_registry_handles_notifications():
+    registry = TokenRevocationRegistry(retention_seconds=60)
+    registry.handle_notification('{"id": "abc", "deleted": true}')
+    registry.handle_notification('{"id": "def", "version": 4}')
+    assert registry.is_revoked("abc", 99)
+    assert registry.is_revoked("def", 3)
+
+async def test_registry_refresh_picks_up_bumps_from_database(db_session, verified_user):
+    verified_user.token_version = 2
+    await db_session.commit()
+    registry = TokenRevocationRegistry(retention_seconds=60)
+    await registry.refresh(db_session)
+    assert registry.is_revoked(str(verified_user.id), 1)
+    assert not registry.is_revoked(str(verified_user.id), 2)
+
+async def test_lockout_revokes_existing_tokens(db_session, verified_user):
+    for _ in range(3):
+        with pytest.raises(HTTPException):
+            await UserService.login_user(db_session, verified_user.email, "WrongPassword!1")
+    assert token_revocation_registry.is_revoked(str(verified_user.id), 0)
+
+async def test_role_change_revokes_existing_tokens(db_session, verified_user):
+    updated_user = await UserService.update(db_session, verified_user.id, {"role": UserRole.MANAGER.name})
+    assert updated_user.token_version == 1
+    assert token_revocation_registry.is_revoked(str(verified_user.id), 0)
+
+async def test_update_without_role_change_keeps_tokens(db_session, verified_user):
+    updated_user = await UserService.update(db_session, verified_user.id, {"role": verified_user.role.name, "first_name": "Same"})
+    assert updated_user.token_version == 0
+    assert not token_revocation_registry.is_revoked(str(verified_user.id), 0)
+
+async def test_revoked_token_is_rejected(async_client, manager_user, manager_token):
+    token_revocation_registry.apply(manager_user.id, 1)
+    response = await async_client.get("/users/", headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 401
+
+async def test_registry_refresh_rereads_the_overlap_window(db_session, verified_user):
+    registry = TokenRevocationRegistry(retention_seconds=60, overlap_seconds=30)
+    await registry.refresh(db_session)
+    registry._watermark = datetime.now(timezone.utc)
+    # A bump committed late by a transaction that started before the watermark.
+    await db_session.execute(
+        update(User).where(User.id == verified_user.id)
+        .values(token_version=3, updated_at=registry._watermark - timedelta(seconds=10))
+    )
+    await db_session.commit()
+    await registry.refresh(db_session)
+    assert registry.is_revoked(str(verified_user.id), 2)
+
+async def test_token_version_bumps_are_notified(db_session, verified_user):
+    user_id = verified_user.id
+    received = []
+    async with engine.connect() as connection:
+        listener = (await connection.get_raw_connection()).driver_connection
+        await listener.add_listener(REVOCATION_CHANNEL, lambda *args: received.append(json.loads(args[-1])))
+        await UserService.bulk_update(db_session, "lock", ids=[user_id])
+        db_session.expire_all()  # the bulk UPDATE does not synchronize loaded users
+        assert await UserService.unlock_user_account(db_session, user_id)
+        for _ in range(50):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.02)
+    assert [message["version"] for message in received] == [1, 2]
+    assert received[0]["id"] == str(user_id)
+
+async def _wait_for(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("condition not met")
+
+async def test_sync_listens_on_a_dedicated_connection_and_relistens_when_it_is_lost(db_session, verified_user):
+    user_id = verified_user.id
+    registry = TokenRevocationRegistry(retention_seconds=60)
+    sync = TokenRevocationSync(
+        registry, poll_seconds=0.05, listen_url=get_settings().database_url, session_factory=AsyncTestingSessionLocal
+    )
+    sync.start()
+    try:
+        await _wait_for(lambda: sync._listen_connection is not None)
+        lost_pid = sync._listen_connection.get_server_pid()
+        await db_session.execute(select(func.pg_terminate_backend(lost_pid)))
+        await _wait_for(lambda: sync._listen_connection is not None and sync._listen_connection.get_server_pid() != lost_pid)
+        # Notification only, with no row change for a poll to find.
+        await db_session.execute(revocation_notification(user_id, 5))
+        await db_session.commit()
+        await _wait_for(lambda: registry.is_revoked(str(user_id), 4))
+    finally:
+        await sync.stop()
+    assert sync._listen_connection is None
+
+async def test_new_account_with_a_deleted_users_email_keeps_its_tokens(db_session, verified_user, email_service):
+    email = verified_user.email
+    assert await UserService.delete(db_session, verified_user.id)
+    new_user = await UserService.create(db_session, {"email": email, "password": "Secure*1234", "role": "ANONYMOUS"}, email_service)
+    token = create_access_token(data={"sub": email, "uid": str(new_user.id), "role": "ANONYMOUS", "ver": new_user.token_version})
+    assert get_current_user(Request({"type": "http"}), token)["user_id"] == email
@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+import pytest
+from app.database import snapshot_session_factory
+from app.models.user_model import UserRole
+from app.services.user_export_service import EXPORT_COLUMNS, UserExportService
+from tests.conftest import engine
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _export(export_format, filters=None, batch_size=None):
+    factory = snapshot_session_factory(engine)
+    return [chunk async for chunk in UserExportService.stream_users(factory, export_format, filters, batch_size)]
+
+
+async def test_export_ndjson_streams_one_chunk_per_batch(users_with_same_role_50_users):
+    chunks = await _export("ndjson", batch_size=20)
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert sorted(row["email"] for row in rows) == sorted(user.email for user in users_with_same_role_50_users)
+    assert set(rows[0]) == {column.key for column in EXPORT_COLUMNS}
+    assert rows[0]["role"] == "AUTHENTICATED"
+    assert "hashed_password" not in rows[0]
+
+
+async def test_export_csv_applies_filters(users_with_same_role_50_users, admin_user):
+    chunks = await _export("csv", {"role": UserRole.ADMIN})
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [row["email"] for row in rows] == [admin_user.email]
+    assert rows[0]["is_locked"] == "False"
+    assert rows[0]["last_login_at"] == ""
+
+
+async def test_export_of_no_users_is_header_only():
+    assert b"".join(await _export("csv")).decode().strip() == ",".join(column.key for column in EXPORT_COLUMNS)
+    assert await _export("ndjson") == []
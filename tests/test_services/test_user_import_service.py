@@ -0,0 +1,88 @@
+import json
+import pytest
+from sqlalchemy import select
+from app.models.user_model import User, UserRole
+from app.services.user_import_service import InvalidImportFormat, UserImportService, import_format, parse_csv
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _stream(body: str, chunk_size: int = 7):
+    """Feeds the body in small chunks so rows and multi-byte characters straddle chunk boundaries."""
+    data = body.encode("utf-8")
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def _ndjson(*rows) -> str:
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+
+def _row(n: int, **overrides):
+    row = {"email": f"import{n}@example.com", "nickname": f"import_{n}", "password": "Secure*1234", "first_name": "Zoë"}
+    row.update(overrides)
+    return row
+
+
+async def test_import_ndjson_reports_each_failed_row(db_session, user):
+    body = _ndjson(
+        _row(1),
+        _row(2, password="short"),
+        _row(3, email=user.email),
+        _row(4, email="import1@example.com"),
+        _row(5, nickname=None),
+    ) + "not json\n"
+
+    report = await UserImportService.import_users(db_session, _stream(body), "application/x-ndjson", batch_size=2)
+
+    assert report["imported"] == 2
+    assert report["failed"] == 4
+    assert [(error["row"], error["error"]) for error in report["errors"]] == [
+        (2, "password: Value error, Password must contain at least 8 characters, an uppercase letter, a digit, a special character."),
+        (3, "Email already exists."),
+        (4, "Email appears more than once in the upload."),
+        (6, "Row could not be parsed."),
+    ]
+    imported = (await db_session.execute(select(User).where(User.email.like("import%")))).scalars().all()
+    assert sorted(u.email for u in imported) == ["import1@example.com", "import5@example.com"]
+    for imported_user in imported:
+        assert imported_user.role == UserRole.ANONYMOUS
+        assert imported_user.verification_token
+        assert imported_user.nickname
+        assert imported_user.first_name == "Zoë"
+        assert imported_user.hashed_password.startswith("$2")
+
+
+async def test_import_csv_handles_quoted_newlines_and_empty_cells(db_session, email_service):
+    body = (
+        "email,nickname,password,bio,first_name\r\n"
+        'csv1@example.com,csv_one,Secure*1234,"Line one\nline two, with comma",\r\n'
+        "csv2@example.com,,Secure*1234,,Ada\r\n"
+    )
+
+    report = await UserImportService.import_users(db_session, _stream(body, 5), "text/csv; charset=utf-8", email_service)
+
+    assert report == {"imported": 2, "failed": 0, "errors": [], "errors_truncated": False}
+    first = (await db_session.execute(select(User).where(User.email == "csv1@example.com"))).scalar_one()
+    assert first.bio == "Line one\nline two, with comma"
+    assert first.first_name is None
+    assert email_service.send_verification_email.await_count == 2
+
+
+async def test_import_rejects_nickname_taken_in_database(db_session, user):
+    body = _ndjson(_row(1, nickname=user.nickname))
+    report = await UserImportService.import_users(db_session, _stream(body), "application/x-ndjson")
+    assert report["imported"] == 0
+    assert report["errors"] == [{"row": 1, "email": "import1@example.com", "error": "Nickname already exists."}]
+
+
+async def test_csv_without_header_is_rejected():
+    with pytest.raises(InvalidImportFormat):
+        [row async for row in parse_csv(_stream(""))]
+
+
+def test_import_format_from_content_type():
+    assert import_format("application/x-ndjson") == "ndjson"
+    assert import_format("text/csv; charset=utf-8") == "csv"
+    with pytest.raises(InvalidImportFormat):
+        import_format("application/json")
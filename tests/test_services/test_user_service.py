@@ -1,15 +1,21 @@
 from builtins import range
+import asyncio
 import pytest
-from sqlalchemy import select
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
 from app.dependencies import get_settings
 from app.models.user_model import User, UserRole
-from app.services.user_service import UserService
+from app.services.token_revocation_service import token_revocation_registry
+from app.services.user_service import USER_CACHE_MISS, UserCache, UserService, user_cache
 from app.utils.nickname_gen import generate_nickname
+from app.utils.security import hash_password
 from unittest.mock import AsyncMock, patch
 from datetime import date
 import uuid
 from fastapi import HTTPException
 from uuid import uuid4
+from tests.conftest import engine
 
 
 pytestmark = pytest.mark.asyncio
@@ -128,6 +134,35 @@ async def test_login_user_successful(db_session, verified_user):
     logged_in_user = await UserService.login_user(db_session, user_data["email"], user_data["password"])
     assert logged_in_user is not None
 
+# Test that a successful login upgrades a hash created with a stale cost factor
+async def test_login_user_rehashes_stale_cost_factor(db_session, verified_user, monkeypatch):
+    monkeypatch.setattr("app.utils.security._bcrypt_rounds", 4)
+    assert not verified_user.hashed_password.startswith("$2b$04$")
+    await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234")
+    refreshed_user = await UserService.get_by_email(db_session, verified_user.email)
+    assert refreshed_user.hashed_password.startswith("$2b$04$")
+
+# Test that a correct password checked while failures lock the account does not undo the lock
+async def test_login_user_refused_when_locked_during_password_check(db_session, verified_user):
+    user_id, email = verified_user.id, verified_user.email
+
+    async def lock_concurrently(password, hashed_password):
+        async with engine.begin() as connection:
+            await connection.execute(
+                update(User).where(User.id == user_id)
+                .values(is_locked=True, failed_login_attempts=get_settings().max_login_attempts)
+            )
+        return True
+
+    with patch("app.services.user_service.verify_password_async", side_effect=lock_concurrently):
+        with pytest.raises(HTTPException) as exc_info:
+            await UserService.login_user(db_session, email, "MySuperPassword$1234")
+    assert exc_info.value.status_code == 400
+    await db_session.rollback()
+    refreshed_user = await UserService.get_by_id(db_session, user_id)
+    assert refreshed_user.is_locked
+    assert refreshed_user.failed_login_attempts == get_settings().max_login_attempts
+
 # Test user login with incorrect email
 async def test_login_user_incorrect_email(db_session):
     with patch.object(UserService, "get_by_email", AsyncMock(return_value=None)):
@@ -161,6 +196,35 @@ async def test_account_lock_after_failed_logins(db_session, verified_user):
     refreshed_user = await UserService.get_by_email(db_session, verified_user.email)
     assert refreshed_user.is_locked
 
+# Test that parallel bad-password storms lock the account after exactly max_login_attempts failures
+async def test_account_lockout_is_exact_under_concurrent_failures(db_session, verified_user):
+    settings = get_settings()
+    verified_user.hashed_password = hash_password("MySuperPassword$1234", 4)
+    await db_session.commit()
+
+    # Each attempt needs its own connection for the UPDATEs to really race.
+    engine = create_async_engine(settings.database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def attempt_login():
+        async with session_factory() as session:
+            with pytest.raises(HTTPException) as exc_info:
+                await UserService.login_user(session, verified_user.email, "WrongPassword!1")
+            return exc_info.value.status_code
+
+    try:
+        statuses = await asyncio.gather(*(attempt_login() for _ in range(10)))
+    finally:
+        await engine.dispose()
+
+    assert set(statuses) <= {400, 401}
+    result = await db_session.execute(
+        select(User.failed_login_attempts, User.is_locked).where(User.id == verified_user.id)
+    )
+    failed_login_attempts, is_locked = result.one()
+    assert failed_login_attempts == settings.max_login_attempts
+    assert is_locked
+
 # Test resetting a user's password
 async def test_reset_password(db_session, user):
     new_password = "NewPassword123!"
@@ -234,4 +298,406 @@ async def test_verify_email_invalid_token(db_session, user):
 @pytest.mark.asyncio
 async def test_unlock_user_account_non_existent(db_session):
     result = await UserService.unlock_user_account(db_session, uuid4())
-    assert result is False
\ No newline at end of file
+    assert result is False
+async def _walk_pages(session, sort_by, order, limit):
+    ids, cursor, seen = [], None, 0
+    while True:
+        page = await UserService.search_users(session, limit=limit, sort_by=sort_by, order=order, cursor=cursor, keyset=True)
+        ids.extend(user.id for user in page.users)
+        seen += 1
+        if page.next_cursor is None:
+            return ids, page
+        assert seen < 100
+        cursor = page.next_cursor
+
+@pytest.mark.parametrize("sort_by", ["email", "nickname", "created_at", "updated_at", "first_name", "last_name"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_search_users_keyset_matches_full_sort(db_session, users_with_same_role_50_users, sort_by, order):
+    for user in users_with_same_role_50_users[:7]:
+        user.first_name = None  # NULL sort keys must neither repeat nor go missing
+        user.last_name = "Same"
+    await db_session.commit()
+
+    column = getattr(User, sort_by)
+    ordering = (column.desc(), User.id.desc()) if order == "desc" else (column.asc(), User.id.asc())
+    expected = (await db_session.execute(select(User.id).order_by(*ordering))).scalars().all()
+
+    ids, last_page = await _walk_pages(db_session, sort_by, order, limit=6)
+    assert ids == expected
+
+    # Walking back with prev cursors from the last page retraces the same rows in reverse.
+    back, page = list(last_page.users), last_page
+    while page.prev_cursor:
+        page = await UserService.search_users(db_session, limit=6, sort_by=sort_by, order=order, cursor=page.prev_cursor)
+        back = list(page.users) + back
+    assert [user.id for user in back] == expected
+
+async def test_search_users_keyset_first_page_has_no_prev(db_session, users_with_same_role_50_users):
+    page = await UserService.search_users(db_session, limit=10, keyset=True)
+    assert page.total == 50
+    assert len(page.users) == 10
+    assert page.prev_cursor is None
+    assert page.next_cursor is not None
+
+async def test_search_users_rejects_bad_or_mismatched_cursor(db_session, users_with_same_role_50_users):
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.search_users(db_session, cursor="not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+    page = await UserService.search_users(db_session, limit=5, sort_by="email", keyset=True)
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.search_users(db_session, limit=5, sort_by="nickname", cursor=page.next_cursor)
+    assert exc_info.value.status_code == 400
+
+@pytest.mark.parametrize("skip", [0, 20, 200])
+async def test_search_users_exact_count_with_window(db_session, users_with_same_role_50_users, skip):
+    page = await UserService.search_users(db_session, skip=skip, limit=10, count_mode="exact")
+    assert page.total == 50
+    assert page.total_mode == "exact"
+    assert len(page.users) == (10 if skip < 50 else 0)
+
+async def test_search_users_count_modes(db_session, users_with_same_role_50_users):
+    page = await UserService.search_users(db_session, limit=10, count_mode="none")
+    assert page.total is None
+    assert page.total_mode == "none"
+    assert len(page.users) == 10
+
+    page = await UserService.search_users(db_session, limit=10, count_mode="estimated")
+    assert page.total_mode == "estimated"
+    assert isinstance(page.total, int) and page.total >= 0
+
+    page = await UserService.search_users(db_session, limit=10, role=UserRole.AUTHENTICATED, count_mode="estimated")
+    assert isinstance(page.total, int) and page.total >= 0
+
+async def test_search_users_cached_count(db_session, users_with_same_role_50_users):
+    page = await UserService.search_users(db_session, email="EXAMPLE", count_mode="cached")
+    expected = page.total
+    db_session.add(User(nickname=generate_nickname(), email="late@example.com", hashed_password="x",
+                        role=UserRole.AUTHENTICATED, email_verified=True))
+    await db_session.commit()
+
+    # Same filters, normalized: the cached total is reused until it expires.
+    page = await UserService.search_users(db_session, email="example", count_mode="cached")
+    assert page.total == expected
+    assert page.total_mode == "cached"
+
+    page = await UserService.search_users(db_session, email="example", count_mode="exact")
+    assert page.total == expected + 1
+
+async def test_search_users_keyset_count_none(db_session, users_with_same_role_50_users):
+    page = await UserService.search_users(db_session, limit=10, keyset=True, count_mode="none")
+    assert page.total is None
+    assert page.next_cursor is not None
+
+async def test_search_users_escapes_like_wildcards(db_session, users_with_same_role_50_users):
+    page = await UserService.search_users(db_session, email="%", limit=100)
+    assert page.total == 0
+    page = await UserService.search_users(db_session, nickname="_", limit=100)
+    assert all("_" in user.nickname for user in page.users)
+
+async def test_search_users_short_terms_match_prefix(db_session, users_with_same_role_50_users):
+    user = users_with_same_role_50_users[0]
+    page = await UserService.search_users(db_session, email=user.email[:2], limit=100)
+    assert page.users
+    assert all(u.email.lower().startswith(user.email[:2].lower()) for u in page.users)
+
+    page = await UserService.search_users(db_session, email=user.email[1:5], limit=100)
+    assert user.id in [u.id for u in page.users]
+
+@pytest.fixture
+async def profiled_users(db_session):
+    profiles = [
+        ("pyfan", "Ada", "Lovelace", "Python and more python, all day", UserRole.AUTHENTICATED),
+        ("gopher", "Grace", "Hopper", "Go services, occasionally python scripts", UserRole.AUTHENTICATED),
+        ("rustacean", "Python", "Smith", "Systems work in Rust", UserRole.MANAGER),
+        ("quiet", "Alan", "Turing", None, UserRole.AUTHENTICATED),
+    ]
+    users = []
+    for nickname, first_name, last_name, bio, role in profiles:
+        user = User(nickname=nickname, email=f"{nickname}@example.com", first_name=first_name, last_name=last_name,
+                    bio=bio, hashed_password="x", role=role, email_verified=True)
+        db_session.add(user)
+        users.append(user)
+    await db_session.commit()
+    return users
+
+async def test_search_users_full_text_ranked(db_session, profiled_users):
+    page = await UserService.search_users(db_session, q="python")
+    nicknames = [user.nickname for user in page.users]
+    assert set(nicknames) == {"pyfan", "gopher", "rustacean"}
+    assert page.total == 3
+    # A name match (weight A) outranks bio-only matches.
+    assert nicknames[0] == "rustacean"
+    assert nicknames.index("pyfan") < nicknames.index("gopher")
+
+async def test_search_users_full_text_combines_with_filters(db_session, profiled_users):
+    page = await UserService.search_users(db_session, q="python", role=UserRole.MANAGER)
+    assert [user.nickname for user in page.users] == ["rustacean"]
+
+    page = await UserService.search_users(db_session, q='python -rust', sort_by="nickname", order="asc")
+    assert [user.nickname for user in page.users] == ["gopher", "pyfan"]
+
+async def test_search_users_full_text_highlights(db_session, profiled_users):
+    page = await UserService.search_users(db_session, q="hopper", highlight=True)
+    assert [user.nickname for user in page.users] == ["gopher"]
+    assert "<mark>Hopper</mark>" in page.highlights[page.users[0].id]
+
+async def test_search_users_relevance_needs_offset_mode(db_session, profiled_users):
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.search_users(db_session, q="python", keyset=True)
+    assert exc_info.value.status_code == 400
+    page = await UserService.search_users(db_session, q="python", sort_by="email", keyset=True, highlight=True)
+    assert len(page.users) == 3
+    assert set(page.highlights) == {user.id for user in page.users}
+
+async def test_get_user_view_reads_response_columns_only(db_session, user):
+    view = await UserService.get_user_view(db_session, user.id)
+    assert view.id == user.id and view.email == user.email
+    assert not hasattr(view, "hashed_password")
+    assert not isinstance(view, User)
+    assert await UserService.get_user_view(db_session, uuid4()) is None
+
+async def test_search_users_projected_rows(db_session, users_with_same_role_50_users):
+    page = await UserService.search_users(db_session, limit=10, sort_by="email", projected=True)
+    full = await UserService.search_users(db_session, limit=10, sort_by="email")
+    assert [row.id for row in page.users] == [user.id for user in full.users]
+    assert page.total == 50
+    assert not isinstance(page.users[0], User)
+
+    page = await UserService.search_users(db_session, limit=10, sort_by="email", projected=True, keyset=True)
+    following = await UserService.search_users(db_session, limit=10, sort_by="email", projected=True, cursor=page.next_cursor)
+    assert [row.id for row in following.users] == [user.id for user in (await UserService.search_users(
+        db_session, skip=10, limit=10, sort_by="email")).users]
+
+async def test_bulk_unlock_by_filter_in_chunks(db_session, users_with_same_role_50_users):
+    locked_ids = [user.id for user in users_with_same_role_50_users[:23]]
+    await db_session.execute(update(User).where(User.id.in_(locked_ids)).values(is_locked=True, failed_login_attempts=3))
+    await db_session.commit()
+
+    dry = await UserService.bulk_update(db_session, "unlock", filters={"is_locked": True}, dry_run=True)
+    assert (dry.matched, dry.updated, dry.chunks) == (23, 0, 0)
+
+    result = await UserService.bulk_update(db_session, "unlock", filters={"is_locked": True}, chunk_size=10)
+    assert (result.updated, result.chunks) == (23, 3)
+    remaining = await db_session.execute(select(func.count()).select_from(User).where(User.is_locked.is_(True)))
+    assert remaining.scalar() == 0
+    unlocked = (await db_session.execute(
+        select(User.failed_login_attempts, User.token_version, User.version).where(User.id == locked_ids[0])
+    )).one()
+    assert tuple(unlocked) == (0, 1, 2)
+
+    # Users already in the target state are not touched again.
+    assert (await UserService.bulk_update(db_session, "unlock", filters={})).updated == 0
+
+async def test_bulk_set_role_by_ids_revokes_tokens_and_skips_caller(db_session, users_with_same_role_50_users, admin_user):
+    targets = users_with_same_role_50_users[:3]
+    ids = [user.id for user in targets] + [admin_user.id]
+    result = await UserService.bulk_update(
+        db_session, "set_role", ids=ids, role=UserRole.MANAGER, exclude_subject=str(admin_user.id)
+    )
+    assert result.updated == 3
+    roles = dict((await db_session.execute(select(User.id, User.role).where(User.id.in_(ids)))).all())
+    assert roles[admin_user.id] == UserRole.ADMIN
+    assert {roles[user.id] for user in targets} == {UserRole.MANAGER}
+    assert token_revocation_registry.is_revoked(str(targets[0].id), 0)
+
+async def test_bulk_set_professional(db_session, users_with_same_role_50_users):
+    result = await UserService.bulk_update(
+        db_session, "set_professional", filters={"role": UserRole.AUTHENTICATED}, is_professional=True
+    )
+    assert result.updated == 50
+    stamped = await db_session.execute(
+        select(func.count()).select_from(User).where(User.professional_status_updated_at.isnot(None))
+    )
+    assert stamped.scalar() == 50
+
+async def test_bulk_update_rejects_ambiguous_selection(db_session):
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.bulk_update(db_session, "lock")
+    assert exc_info.value.status_code == 400
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.bulk_update(db_session, "set_role", filters={})
+    assert exc_info.value.status_code == 400
+
+async def test_allocate_nickname_checks_candidates_in_batches(db_session, monkeypatch):
+    monkeypatch.setattr("app.utils.nickname_gen.ADJECTIVES", ["tiny"])
+    monkeypatch.setattr("app.utils.nickname_gen.ANIMALS", ["ant"])
+    monkeypatch.setattr("app.utils.nickname_gen.settings.nickname_number_digits", 1)
+    for number in range(9):
+        db_session.add(User(nickname=f"tiny_ant_{number}", email=f"ant{number}@example.com",
+                            hashed_password="x", role=UserRole.AUTHENTICATED))
+    await db_session.commit()
+
+    # One batch covers the whole ten-name namespace, so the single free name is found at once.
+    assert await UserService.allocate_nickname(db_session) == "tiny_ant_9"
+
+    db_session.add(User(nickname="tiny_ant_9", email="ant9@example.com", hashed_password="x", role=UserRole.AUTHENTICATED))
+    await db_session.commit()
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.allocate_nickname(db_session)
+    assert exc_info.value.status_code == 503
+
+async def test_create_first_user_is_admin_then_skips_count(db_session, email_service, monkeypatch):
+    admin = await UserService.create(db_session, {"email": "first@example.com", "password": "Secure*1234", "role": "ANONYMOUS"}, email_service)
+    assert admin.role == UserRole.ADMIN and admin.email_verified
+    assert UserService._users_exist
+
+    monkeypatch.setattr(UserService, "count", AsyncMock(side_effect=AssertionError("count() should be cached")))
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        second = await UserService.create(db_session, {"email": "second@example.com", "password": "Secure*1234", "role": "ADMIN"}, email_service)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert second.role == UserRole.ANONYMOUS and second.verification_token
+    assert second.created_at is not None
+    assert len(statements) == 1 and statements[0].startswith("INSERT INTO users")
+
+async def test_create_maps_unique_conflicts_to_400(db_session, email_service, user):
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.create(db_session, {"email": user.email, "password": "Secure*1234", "role": "ANONYMOUS"}, email_service)
+    assert (exc_info.value.status_code, exc_info.value.detail) == (400, "Email already exists.")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.create(db_session, {
+            "email": "fresh@example.com", "nickname": user.nickname, "password": "Secure*1234", "role": "ANONYMOUS"
+        }, email_service)
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail.startswith("Nickname already exists.")
+
+async def test_create_retries_a_clashing_generated_nickname(db_session, email_service, user, monkeypatch):
+    monkeypatch.setattr("app.services.user_service.generate_nickname", lambda: user.nickname)
+    created = await UserService.create(db_session, {"email": "clash@example.com", "password": "Secure*1234", "role": "ANONYMOUS"}, email_service)
+    assert created.nickname != user.nickname
+
+async def test_update_is_one_statement(db_session, user):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        updated = await UserService.update(db_session, user.id, {"first_name": "Single"})
+        assert len(statements) == 1 and statements[0].startswith("UPDATE users")
+        # A role change also tells the other workers about the token version bump.
+        updated = await UserService.update(db_session, user.id, {"role": UserRole.MANAGER.name})
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert (updated.first_name, updated.role, updated.token_version) == ("Single", UserRole.MANAGER, 1)
+    assert len(statements) == 3 and "pg_notify" in statements[2]
+
+async def test_update_maps_unique_violations_to_400(db_session, user, verified_user):
+    email, nickname, user_id = verified_user.email, verified_user.nickname, user.id
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.update(db_session, user_id, {"email": email})
+    assert (exc_info.value.status_code, exc_info.value.detail) == (400, "Email is already in use.")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await UserService.update(db_session, user_id, {"nickname": nickname})
+    assert (exc_info.value.status_code, exc_info.value.detail) == (400, "Nickname is already in use.")
+
+async def test_update_keeping_own_email_succeeds(db_session, user):
+    updated = await UserService.update(db_session, user.id, {"email": user.email, "nickname": user.nickname})
+    assert updated is not None and updated.email == user.email
+
+async def test_delete_returns_the_deleted_row_in_one_statement(db_session, user):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        assert await UserService.delete(db_session, user.id) is True
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert statements[0].startswith("DELETE FROM users")
+    assert not any(statement.startswith("SELECT users") for statement in statements)
+    assert token_revocation_registry.is_revoked(str(user.id), 0)
+
+async def test_update_with_stale_version_changes_nothing(db_session, user):
+    user_id = user.id
+    first = await UserService.update(db_session, user_id, {"bio": "first"}, expected_versions=[1])
+    assert first.version == 2
+    assert await UserService.update(db_session, user_id, {"bio": "second"}, expected_versions=[1]) is None
+    row = (await db_session.execute(select(User.bio, User.version).where(User.id == user_id))).one()
+    assert tuple(row) == ("first", 2)
+
+async def test_user_view_lookups_are_cached_and_invalidated_by_writes(db_session, user):
+    user_id, email = user.id, user.email
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        first = await UserService.get_user_view(db_session, user_id)
+        assert await UserService.get_user_view_by_email(db_session, email) is first
+        assert await UserService.get_user_view_by_nickname(db_session, first.nickname) is first
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+
+    await UserService.update(db_session, user_id, {"nickname": "renamed_user"})
+    assert await UserService.get_user_view_by_nickname(db_session, first.nickname) is None
+    assert (await UserService.get_user_view(db_session, user_id)).nickname == "renamed_user"
+    stats = user_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 3, 1)
+
+async def test_unknown_email_logins_are_absorbed_by_negative_entries(db_session):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        for _ in range(5):
+            with pytest.raises(HTTPException) as exc_info:
+                await UserService.login_user(db_session, "nobody@example.com", "Secure*1234")
+            assert exc_info.value.status_code == 401
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert len(statements) == 1
+    assert user_cache.stats()["negative_hits"] == 4
+
+async def test_creating_a_user_clears_its_negative_entry(db_session, email_service):
+    assert await UserService.get_user_view_by_email(db_session, "later@example.com") is None
+    created = await UserService.create(db_session, {"email": "later@example.com", "password": "Secure*1234", "role": "ANONYMOUS"}, email_service)
+    assert (await UserService.get_user_view_by_email(db_session, "later@example.com")).id == created.id
+
+def test_user_cache_evicts_least_recently_used_and_ignores_stale_puts():
+    cache = UserCache(ttl_seconds=60, negative_ttl_seconds=60, max_size=2)
+    rows = [type("Row", (), {"id": uuid4(), "email": f"lru{n}@example.com", "nickname": f"lru_{n}"})() for n in range(3)]
+    cache.put("id", rows[0].id, rows[0], cache.generation)
+    cache.put("id", rows[1].id, rows[1], cache.generation)
+    assert cache.get("email", rows[0].email) is rows[0]
+    cache.put("id", rows[2].id, rows[2], cache.generation)
+    assert cache.get("id", rows[1].id) is USER_CACHE_MISS
+    assert cache.get("nickname", rows[0].nickname) is rows[0]
+    assert cache.stats()["evictions"] == 1
+
+    generation = cache.generation
+    cache.invalidate(rows[0].id)
+    cache.put("id", rows[0].id, rows[0], generation)
+    assert cache.get("id", rows[0].id) is USER_CACHE_MISS
+
+async def test_search_users_estimated_count_with_text_query(db_session, users_with_same_role_50_users):
+    exact = await UserService.search_users(db_session, limit=10, q=users_with_same_role_50_users[0].nickname)
+    page = await UserService.search_users(
+        db_session, limit=10, q=users_with_same_role_50_users[0].nickname, count_mode="estimated",
+        role=UserRole.AUTHENTICATED, registered_from=date(2000, 1, 1), is_locked=False,
+    )
+    assert page.total_mode == "estimated"
+    assert isinstance(page.total, int) and page.total >= 1
+    assert [user.id for user in page.users] == [user.id for user in exact.users]
+
+async def test_email_verification_bumps_the_version(db_session, user):
+    user_id, token = user.id, user.verification_token
+    assert await UserService.verify_email_with_token(db_session, user_id, token)
+    assert (await db_session.execute(select(User.version).where(User.id == user_id))).scalar() == 2
+    # An ETag read before verification no longer matches, so the role change cannot be overwritten.
+    assert await UserService.update(db_session, user_id, {"first_name": "Stale"}, expected_versions=[1]) is None
+
+async def test_login_and_lockout_keep_the_version(db_session, verified_user):
+    user_id, email = verified_user.id, verified_user.email
+    await UserService.login_user(db_session, email, "MySuperPassword$1234")
+    await UserService.commit_login(db_session, verified_user)
+    for _ in range(get_settings().max_login_attempts):
+        with pytest.raises(HTTPException):
+            await UserService.login_user(db_session, email, "WrongPassword!1")
+    assert (await db_session.execute(select(User.version).where(User.id == user_id))).scalar() == 1
+    # An admin edit with an ETag read before those logins still applies.
+    updated = await UserService.update(db_session, user_id, {"first_name": "Current"}, expected_versions=[1])
+    assert updated is not None and updated.version == 2